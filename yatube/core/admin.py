@@ -0,0 +1,34 @@
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Task
+
+
+def message_task_queued(modeladmin, request, task_obj):
+    """Сообщает о поставленной задаче со ссылкой на её прогресс."""
+    if not isinstance(task_obj, Task):
+        # При TASKS_EAGER задача уже выполнена
+        modeladmin.message_user(request, 'Готово', messages.SUCCESS)
+        return
+    url = reverse('admin:core_task_change', args=[task_obj.pk])
+    modeladmin.message_user(request, format_html(
+        'Задача <a href="{}">{}</a> поставлена в очередь, '
+        'прогресс виден на её странице', url, task_obj), messages.INFO)
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk',
+                    'name',
+                    'status',
+                    'attempts',
+                    'progress',
+                    'total',
+                    'run_after',
+                    'created')
+    list_filter = ['status', 'name']
+    search_fields = ['key']
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
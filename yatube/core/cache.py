@@ -0,0 +1,21 @@
+"""Кэш, общий для всех процессов сайта.
+
+Кэш по умолчанию (locmem) живёт в памяти каждого процесса и годится
+только для того, что можно пересчитать: карточек, фрагментов, готового
+XML лент. Всё, что должны одинаково видеть все воркеры, — токены
+повторной отправки, версии и отметки изменений — хранится в кэше
+SHARED_CACHE_ALIAS. Счётчики ограничения частоты ведутся в своей
+таблице (core.ratelimit): incr кэша на базе не атомарен.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SharedCacheProxy:
+    """Как django.core.cache.cache, но для общего кэша."""
+
+    def __getattr__(self, name):
+        return getattr(caches[settings.SHARED_CACHE_ALIAS], name)
+
+
+shared_cache = SharedCacheProxy()
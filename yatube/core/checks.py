@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core import checks
+
+CACHE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+@checks.register(checks.Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    """Сессии в кэше имеют смысл только при кэше не на базе.
+
+    С DatabaseCache движки cache и cached_db всё равно читают базу
+    на каждый запрос, только дороже, чем движок db.
+    """
+    cache_backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if (
+        settings.SESSION_ENGINE in CACHE_SESSION_ENGINES
+        and cache_backend == DATABASE_CACHE
+    ):
+        return [checks.Error(
+            f'{settings.SESSION_ENGINE} поверх DatabaseCache обращается '
+            'к базе на каждый запрос.',
+            hint='Укажите YATUBE_SESSION_BACKEND=db или Redis/memcached '
+                 'в YATUBE_SHARED_CACHE_BACKEND.',
+            id='core.E001',
+        )]
+    return []
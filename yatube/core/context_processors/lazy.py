@@ -0,0 +1,31 @@
+class LazyValue:
+    """Значение переменной контекста, вычисляемое при первом обращении.
+
+    Шаблоны сами вызывают callable-переменные, поэтому фабрика
+    срабатывает только когда шаблон выводит переменную, и не больше
+    одного раза за рендер. Создать такой объект дешевле, чем
+    SimpleLazyObject или даже datetime.now().
+    """
+    __slots__ = ('factory', 'request', 'value')
+
+    def __init__(self, factory, request):
+        self.factory = factory
+        self.request = request
+
+    def __call__(self):
+        try:
+            return self.value
+        except AttributeError:
+            self.value = self.factory(self.request)
+            return self.value
+
+
+def lazy_processor(**factories):
+    """Собирает context processor, значения которого считаются фабриками
+    factory(request) только для выведенных в шаблоне переменных."""
+    def processor(request):
+        return {
+            name: LazyValue(factory, request)
+            for name, factory in factories.items()
+        }
+    return processor
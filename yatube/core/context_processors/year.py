@@ -1,8 +1,11 @@
 import datetime
 
+from .lazy import lazy_processor
 
-def year(request):
-    """Добавляет переменную с текущим годом."""
-    return {
-        'year': datetime.datetime.now().year
-    }
+
+def current_year(request):
+    return datetime.datetime.now().year
+
+
+# Переменная year с текущим годом, вычисляемая только при выводе
+year = lazy_processor(year=current_year)
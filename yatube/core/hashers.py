@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 с числом итераций из настройки PASSWORD_ITERATIONS.
+
+    Имя алгоритма то же, что у стандартного хешера, поэтому старые хеши
+    проверяются без изменений, а при входе с другим числом итераций
+    Django сам перехеширует пароль — и при увеличении, и при уменьшении.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_ITERATIONS
@@ -0,0 +1,70 @@
+"""Защита от повторной отправки форм.
+
+Шаблонный тег idempotency_token добавляет в форму одноразовый токен.
+Декоратор idempotent запоминает в общем кэше (core.cache), куда
+перенаправил первый запрос с этим токеном, и повторные отправки
+(двойной клик, повтор после обрыва связи) получают тот же редирект
+без второй записи в базу, даже если попали в другой воркер.
+"""
+import functools
+import time
+from http import HTTPStatus
+from uuid import uuid4
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import redirect
+
+from .cache import shared_cache
+
+TOKEN_FIELD = 'idempotency_token'
+PENDING = '__pending__'
+WAIT_STEP = 0.05
+
+
+def new_token():
+    return uuid4().hex
+
+
+def wait_for_result(key):
+    """Ждёт, пока первый запрос с тем же токеном завершится.
+
+    Возвращает адрес редиректа, None, если первый запрос ничего
+    не записал, или PENDING, если он не успел завершиться.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    result = shared_cache.get(key)
+    while result == PENDING and time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        result = shared_cache.get(key)
+    return result
+
+
+def idempotent(view):
+    """Повторяет редирект первого запроса вместо повторной записи."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = request.POST.get(TOKEN_FIELD)
+        if request.method != 'POST' or not token:
+            return view(request, *args, **kwargs)
+        key = f'idempotency:{request.user.pk}:{token}'
+        while not shared_cache.add(key, PENDING, settings.IDEMPOTENCY_TIMEOUT):
+            result = wait_for_result(key)
+            if result == PENDING:
+                return HttpResponse(status=HTTPStatus.CONFLICT)
+            if result is not None:
+                return redirect(result)
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            # Иначе повтор с этим токеном получал бы 409 до истечения
+            # IDEMPOTENCY_TIMEOUT
+            shared_cache.delete(key)
+            raise
+        if response.status_code == HTTPStatus.FOUND:
+            shared_cache.set(key, response.url, settings.IDEMPOTENCY_TIMEOUT)
+        else:
+            # Форма с ошибками: повтор с тем же токеном обработается заново
+            shared_cache.delete(key)
+        return response
+    return wrapper
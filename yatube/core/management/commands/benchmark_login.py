@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = ('Измеряет, сколько проверок пароля в секунду выдерживает одно '
+            'ядро при текущем хешере, — это потолок входов на ядро.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=2,
+            help='Сколько секунд мерить каждый вариант.')
+        parser.add_argument(
+            '--iterations', type=int, nargs='*',
+            help='Сравнить несколько значений PASSWORD_ITERATIONS.')
+
+    def handle(self, *args, **options):
+        for iterations in (options['iterations']
+                           or [settings.PASSWORD_ITERATIONS]):
+            with override_settings(PASSWORD_ITERATIONS=iterations):
+                rate = self.measure(options['seconds'])
+            self.stdout.write(
+                f'{get_hasher().algorithm}, итераций {iterations}: '
+                f'{rate:.1f} входов/с на ядро')
+
+    def measure(self, seconds):
+        encoded = get_hasher().encode('password', get_hasher().salt())
+        done = 0
+        deadline = time.monotonic() + seconds
+        started = time.monotonic()
+        while time.monotonic() < deadline:
+            check_password('password', encoded)
+            done += 1
+        return done / (time.monotonic() - started)
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет просроченные сессии из базы пачками, чтобы не держать '
+            'блокировку записи SQLite на время одного большого DELETE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.SESSION_CLEANUP_BATCH_SIZE,
+            help='Сколько сессий удалять за один запрос.')
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками, сек.')
+
+    def handle(self, *args, **options):
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            batch = list(expired.values_list(
+                'session_key', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted += Session.objects.filter(
+                session_key__in=batch).delete()[0]
+            time.sleep(options['pause'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
@@ -0,0 +1,59 @@
+import os
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = ('Измеряет, сколько стоят context processors на один рендер '
+            'для каждого шаблона из каталогов TEMPLATES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз рендерить каждый шаблон.')
+
+    def handle(self, *args, **options):
+        backend = engines['django']
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        repeat = options['repeat']
+        processors = backend.engine.template_context_processors
+        processors_time = self.timeit(
+            lambda: [processor(request) for processor in processors],
+            repeat)
+        self.stdout.write(
+            f'context processors: {processors_time * 1e6:.1f} мкс на рендер')
+        for processor in processors:
+            spent = self.timeit(lambda: processor(request), repeat)
+            self.stdout.write(
+                f'  {processor.__module__}.{processor.__name__}: '
+                f'{spent * 1e6:.1f} мкс')
+        for name in self.template_names(backend.engine.dirs):
+            template = backend.get_template(name)
+            try:
+                template.render({}, request)
+            except Exception as error:
+                self.stdout.write(f'{name}: пропущен ({type(error).__name__})')
+                continue
+            render_time = self.timeit(
+                lambda: template.render({}, request), repeat)
+            self.stdout.write(
+                f'{name}: {render_time * 1e6:.0f} мкс на рендер, '
+                f'context processors — {processors_time / render_time:.1%}')
+
+    def timeit(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
+
+    def template_names(self, dirs):
+        for directory in dirs:
+            for root, _, files in os.walk(directory):
+                for file_name in sorted(files):
+                    path = os.path.join(root, file_name)
+                    yield os.path.relpath(path, directory)
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import RateLimitCounter, Task
+from core.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза между опросами пустой очереди, сек.')
+        parser.add_argument(
+            '--keep-days', type=int, default=7,
+            help='Сколько дней хранить выполненные задачи.')
+
+    def handle(self, *args, **options):
+        self.purge_done(options['keep_days'])
+        RateLimitCounter.objects.filter(
+            expires_at__lt=timezone.now()).delete()
+        while True:
+            done = run_pending()
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if options['once']:
+                return
+            if not done:
+                time.sleep(options['interval'])
+
+    def purge_done(self, keep_days):
+        """Удаляет старые выполненные задачи вместе с их ключами."""
+        Task.objects.filter(
+            status=Task.DONE,
+            created__lt=timezone.now() - timedelta(days=keep_days)
+        ).delete()
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from posts.models import Post
+
+User = get_user_model()
+
+STRESS_ALIAS = 'sqlite_stress'
+STRESS_USERNAME = 'sqlite_stress'
+
+
+def reader(deadline, results):
+    """Читает первую страницу ленты, пока не выйдет время."""
+    posts = Post.objects.using(STRESS_ALIAS).select_related('author', 'group')
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            list(posts[:10])
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def writer(deadline, results, user_id):
+    """Создаёт посты от служебного пользователя, пока не выйдет время.
+
+    bulk_create не шлёт сигналов, поэтому запись не трогает кэши,
+    архив и статистику рабочей базы.
+    """
+    posts = Post.objects.using(STRESS_ALIAS)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            posts.bulk_create([Post(text='stress', author_id=user_id)])
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('write', done, errors))
+
+
+class Command(BaseCommand):
+    help = ('Нагружает копию базы параллельными читателями и писателями '
+            'из нескольких процессов и выводит число операций и ошибок '
+            '"database is locked". Рабочая база не меняется.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Команда проверяет только базу SQLite.')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.copy_database(os.path.join(tmp_dir, 'stress.sqlite3'))
+            try:
+                totals = self.run_processes(options)
+            finally:
+                connections[STRESS_ALIAS].close()
+                del connections[STRESS_ALIAS]
+                del connections.databases[STRESS_ALIAS]
+        for kind, (done, errors) in totals.items():
+            self.stdout.write(
+                f'{kind}: {done / options["seconds"]:.0f} оп/с, '
+                f'ошибок блокировки: {errors}'
+            )
+
+    def copy_database(self, path):
+        """Копирует основную базу в path и подключает её как STRESS_ALIAS."""
+        source = connections[DEFAULT_DB_ALIAS]
+        source.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        connections.databases[STRESS_ALIAS] = {
+            **connections.databases[DEFAULT_DB_ALIAS], 'NAME': path}
+
+    def run_processes(self, options):
+        user, _ = User.objects.using(STRESS_ALIAS).get_or_create(
+            username=STRESS_USERNAME)
+        # Дочерние процессы не должны унаследовать открытое соединение
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.monotonic() + options['seconds']
+        processes = [
+            context.Process(target=reader, args=(deadline, results))
+            for _ in range(options['readers'])
+        ] + [
+            context.Process(target=writer, args=(deadline, results, user.pk))
+            for _ in range(options['writers'])
+        ]
+        for process in processes:
+            process.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in processes:
+            kind, done, errors = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for process in processes:
+            process.join()
+        return totals
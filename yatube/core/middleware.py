@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+
+from . import routers
+
+PRIMARY_PIN_COOKIE = 'primary_until'
+
+
+class PrimaryPinMiddleware:
+    """Закрепляет чтение за основной базой после записи пользователя.
+
+    Реплики отстают от основной базы, поэтому после поста, комментария
+    или подписки пользователь READ_YOUR_WRITES_SECONDS секунд читает
+    ленту из основной базы и видит свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        routers.start_request(pinned=pinned_until > time.time())
+        response = self.get_response(request)
+        if routers.has_written():
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+            )
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task_claimed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='Ключ')),
+                ('window', models.BigIntegerField(verbose_name='Номер окна')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Запросов')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Устаревает')),
+            ],
+            options={
+                'verbose_name': 'Счётчик запросов',
+                'verbose_name_plural': 'Счётчики запросов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratelimitcounter',
+            constraint=models.UniqueConstraint(fields=('key', 'window'), name='unique_ratelimit_window'),
+        ),
+    ]
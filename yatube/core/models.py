@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,65 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(CreatedModel):
+    """Фоновая задача из очереди core.tasks."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы', default='{}')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    claimed_at = models.DateTimeField('Захвачена', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    progress = models.PositiveIntegerField('Обработано', default=0)
+    total = models.PositiveIntegerField('Всего', null=True, blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class RateLimitCounter(models.Model):
+    """Счётчик запросов в окне ограничения частоты (core.ratelimit)."""
+    key = models.CharField('Ключ', max_length=255)
+    window = models.BigIntegerField('Номер окна')
+    count = models.PositiveIntegerField('Запросов', default=0)
+    expires_at = models.DateTimeField('Устаревает', db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['key', 'window'], name='unique_ratelimit_window')]
+        verbose_name = 'Счётчик запросов'
+        verbose_name_plural = 'Счётчики запросов'
+
+    def __str__(self):
+        return f'{self.key}:{self.window}'
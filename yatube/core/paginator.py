@@ -0,0 +1,58 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который не считает COUNT(*) на каждый запрос.
+
+    Число объектов берётся из кэша и обновляется раз
+    в PAGINATOR_COUNT_TIMEOUT секунд, поэтому на огромных таблицах оно
+    приблизительное: новые посты попадают в число страниц с задержкой.
+    При PAGINATOR_COUNT_TIMEOUT = 0 работает как обычный Paginator.
+    """
+
+    @property
+    def count_timeout(self):
+        return settings.PAGINATOR_COUNT_TIMEOUT
+
+    @cached_property
+    def count(self):
+        timeout = self.count_timeout
+        query = getattr(self.object_list, 'query', None)
+        if not timeout or query is None:
+            return super().count
+        key = 'paginator_count:' + hashlib.md5(
+            str(query).encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout)
+        return count
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """Пагинатор для админки больших таблиц.
+
+    Для таблицы без фильтров число строк оценивается по наибольшему pk
+    (один переход по индексу вместо COUNT(*)): удалённые строки дают
+    лишние пустые страницы в конце. С фильтрами и поиском COUNT(*)
+    кэшируется на ADMIN_COUNT_TIMEOUT секунд.
+    """
+
+    @property
+    def count_timeout(self):
+        return settings.ADMIN_COUNT_TIMEOUT
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return super().count
+        estimate = self.object_list.model._default_manager.aggregate(
+            estimate=Max('pk'))['estimate']
+        return estimate or 0
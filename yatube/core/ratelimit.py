@@ -0,0 +1,90 @@
+"""Ограничение частоты запросов к пишущим view.
+
+Для каждого окна длиной period в таблице RateLimitCounter заводится
+строка, а текущая загрузка оценивается как доля предыдущего окна плюс
+текущее. Таблица общая для всех воркеров, а прирост делается одним
+INSERT ... ON CONFLICT DO UPDATE, поэтому параллельные запросы
+не теряют отсчётов (incr кэша на базе — это отдельные get и set).
+На запрос уходят этот запрос и одно чтение двух окон, без ORM: его
+построение стоило бы втрое дороже самих запросов. Первый запрос в окне
+удаляет устаревшие окна ключа, остальные устаревшие строки удаляет
+команда run_tasks при старте.
+"""
+import functools
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from django.conf import settings
+from django.db import connection
+from django.shortcuts import render
+
+from .models import RateLimitCounter
+
+# Имена в кавычках: WINDOW и KEY — ключевые слова SQL
+TABLE = f'"{RateLimitCounter._meta.db_table}"'
+
+HIT_SQL = f"""
+    INSERT INTO {TABLE} ("key", "window", "count", "expires_at")
+    VALUES (%s, %s, 1, %s)
+    ON CONFLICT ("key", "window") DO UPDATE SET "count" = {TABLE}."count" + 1
+"""
+COUNTS_SQL = f"""
+    SELECT "window", "count" FROM {TABLE}
+    WHERE "key" = %s AND "window" IN (%s, %s)
+"""
+
+
+def is_over_limit(key, limit, period, now=None):
+    """Учитывает запрос и сообщает, превышен ли лимит."""
+    now = time.time() if now is None else now
+    window = int(now // period)
+    expires_at = datetime.fromtimestamp(
+        (window + 2) * period, tz=timezone.utc)
+    with connection.cursor() as cursor:
+        cursor.execute(HIT_SQL, [
+            key, window,
+            connection.ops.adapt_datetimefield_value(expires_at)])
+        cursor.execute(COUNTS_SQL, [key, window - 1, window])
+        counts = dict(cursor.fetchall())
+    if counts[window] == 1:
+        # Первый запрос окна: окна старше предыдущего больше не нужны
+        RateLimitCounter.objects.filter(
+            key=key, window__lt=window - 1).delete()
+    weight = 1 - (now % period) / period
+    return counts.get(window - 1, 0) * weight + counts[window] > limit
+
+
+def get_identities(request):
+    identities = {'ip': request.META.get('REMOTE_ADDR', '')}
+    if request.user.is_authenticated:
+        identities['user'] = request.user.pk
+    return identities
+
+
+def ratelimit(policy, methods=('POST',)):
+    """Ограничивает view по правилам RATE_LIMITS[policy].
+
+    Правило задаёт для 'user' и 'ip' пару (лимит, период в секундах).
+    При превышении возвращается 429 с заголовком Retry-After.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in methods:
+                identities = get_identities(request)
+                for scope, (limit, period) in (
+                    settings.RATE_LIMITS[policy].items()
+                ):
+                    if scope not in identities:
+                        continue
+                    key = f'ratelimit:{policy}:{scope}:{identities[scope]}'
+                    if is_over_limit(key, limit, period):
+                        response = render(
+                            request, 'core/429.html',
+                            status=HTTPStatus.TOO_MANY_REQUESTS)
+                        response['Retry-After'] = str(period)
+                        return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
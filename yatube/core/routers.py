@@ -0,0 +1,68 @@
+import functools
+import random
+import threading
+
+from django.conf import settings
+
+# app_label модели, через которую работает DatabaseCache
+CACHE_APP_LABEL = 'django_cache'
+
+_state = threading.local()
+
+
+def start_request(pinned=False):
+    """Сбрасывает состояние маршрутизации в начале запроса."""
+    _state.replica = False
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def has_written():
+    """Была ли в текущем запросе запись в основную базу."""
+    return getattr(_state, 'wrote', False)
+
+
+def use_replica(view):
+    """Разрешает view читать ленту с реплики."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        _state.replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _state.replica = False
+    return wrapper
+
+
+class ReplicaRouter:
+    """Отправляет чтение ленты на реплики, а запись — в основную базу.
+
+    На реплику уходят только запросы к моделям из REPLICA_APPS внутри
+    view с декоратором use_replica. Пользователь, недавно что-то
+    записавший, читает из основной базы (см. PrimaryPinMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and getattr(_state, 'replica', False)
+            and not getattr(_state, 'pinned', False)
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Запись в общий кэш (DatabaseCache) — не данные пользователя,
+        # и закреплять из-за неё читателя за основной базой не нужно
+        if model._meta.app_label != CACHE_APP_LABEL:
+            _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными
+        return db == 'default'
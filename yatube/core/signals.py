@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def setup_sqlite_connection(sender, connection, **kwargs):
+    """Настраивает новое соединение SQLite через PRAGMA из настроек."""
+    if connection.vendor != 'sqlite':
+        return
+    for pragma, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """Закрывает сломанные долгоживущие соединения до начала запроса.
+
+    Django сам проверяет соединение только после ошибки в предыдущем
+    запросе, а с CONN_MAX_AGE оно могло умереть между запросами.
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    for conn in connections.all():
+        if (
+            conn.connection is not None
+            and not conn.in_atomic_block
+            and not conn.is_usable()
+        ):
+            conn.close()
@@ -0,0 +1,49 @@
+import csv
+from itertools import islice
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+# Место в шаблоне, куда подставляются строки потока
+STREAM_MARKER = '<!--stream-->'
+
+
+def chunked(queryset, chunk_size):
+    """Читает queryset порциями через iterator(), не держа в памяти
+    весь результат и кэш queryset."""
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_template(template_name, context, rows, request=None):
+    """Отдаёт страницу по частям.
+
+    Шаблон рендерится один раз с маркером в переменной stream: всё до
+    маркера уходит клиенту сразу, затем строки из rows, затем остаток
+    страницы.
+    """
+    context = dict(context, stream=mark_safe(STREAM_MARKER))
+    page = render_to_string(template_name, context, request)
+    head, tail = page.split(STREAM_MARKER, 1)
+    yield head
+    yield from rows
+    yield tail
+
+
+class Echo:
+    """Файл для csv.writer, который просто возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """Построчно отдаёт CSV с заголовком header."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,153 @@
+"""Простая очередь фоновых задач в базе данных.
+
+Задача — функция, зарегистрированная декоратором ``task``. Вызов
+``func.delay(...)`` кладёт её в таблицу Task, а команда ``run_tasks``
+выполняет задачи с повторами при ошибках. Задача, чей воркер умер
+посреди выполнения, возвращается в очередь по истечении аренды
+TASKS_LEASE_SECONDS. Модули ``tasks.py`` всех
+приложений импортируются при старте, чтобы задачи были зарегистрированы.
+"""
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_current = threading.local()
+
+
+def task(func=None, *, max_attempts=3):
+    """Регистрирует функцию как фоновую задачу и добавляет ей delay()."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.delay = (
+            lambda *args, key=None, **kwargs:
+            enqueue(name, *args, key=key, **kwargs)
+        )
+        _registry[name] = func
+        return func
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def enqueue(name, *args, key=None, **kwargs):
+    """Ставит задачу в очередь.
+
+    Повторная постановка с тем же key ничего не делает, пока выполненная
+    задача с этим ключом хранится в таблице. При TASKS_EAGER задача
+    выполняется сразу.
+    """
+    if settings.TASKS_EAGER:
+        return _registry[name](*args, **kwargs)
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    if key is None:
+        return Task.objects.create(name=name, payload=payload)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(name=name, payload=payload, key=key)
+    except IntegrityError:
+        return Task.objects.get(key=key)
+
+
+def run_task(task_obj):
+    """Выполняет одну задачу, уже захваченную воркером."""
+    func = _registry.get(task_obj.name)
+    payload = json.loads(task_obj.payload)
+    task_obj.attempts += 1
+    _current.task = task_obj
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task_obj.name} не зарегистрирована')
+        func(*payload['args'], **payload['kwargs'])
+    except Exception as error:
+        logger.exception('Задача %s завершилась ошибкой', task_obj)
+        task_obj.last_error = repr(error)
+        max_attempts = getattr(func, 'max_attempts', 1)
+        if task_obj.attempts >= max_attempts:
+            task_obj.status = Task.FAILED
+        else:
+            task_obj.status = Task.PENDING
+            task_obj.run_after = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** task_obj.attempts)
+    else:
+        task_obj.status = Task.DONE
+        task_obj.last_error = ''
+    finally:
+        _current.task = None
+    task_obj.save(
+        update_fields=['status', 'attempts', 'run_after', 'last_error'])
+
+
+def set_progress(progress, total=None):
+    """Сохраняет прогресс выполняемой задачи для админки.
+
+    Вне воркера (например, при TASKS_EAGER) ничего не делает.
+    """
+    task_obj = getattr(_current, 'task', None)
+    if task_obj is None:
+        return
+    # Отметка о прогрессе продлевает аренду задачи
+    fields = {'progress': progress, 'claimed_at': timezone.now()}
+    if total is not None:
+        fields['total'] = total
+    Task.objects.filter(pk=task_obj.pk).update(**fields)
+
+
+def reclaim_stale(now=None):
+    """Возвращает в очередь задачи, брошенные упавшими воркерами.
+
+    Задача в статусе RUNNING без отметок дольше TASKS_LEASE_SECONDS
+    считается неудачной попыткой: она снова ждёт запуска или, если
+    попытки исчерпаны, помечается как FAILED. Возвращает число задач.
+    """
+    now = now or timezone.now()
+    expired = now - timedelta(seconds=settings.TASKS_LEASE_SECONDS)
+    stale = Task.objects.filter(status=Task.RUNNING).filter(
+        Q(claimed_at__lt=expired) | Q(claimed_at__isnull=True))
+    reclaimed = 0
+    for task_obj in stale.only('name', 'attempts', 'claimed_at'):
+        func = _registry.get(task_obj.name)
+        attempts = task_obj.attempts + 1
+        if attempts >= getattr(func, 'max_attempts', 1):
+            status = Task.FAILED
+        else:
+            status = Task.PENDING
+        # Условие на claimed_at: задачу не перехватили и не продлили
+        reclaimed += Task.objects.filter(
+            pk=task_obj.pk, status=Task.RUNNING,
+            claimed_at=task_obj.claimed_at
+        ).update(status=status, attempts=attempts, run_after=now,
+                 last_error='Воркер не завершил задачу')
+    if reclaimed:
+        logger.warning('Возвращено брошенных задач: %s', reclaimed)
+    return reclaimed
+
+
+def run_pending(limit=100):
+    """Выполняет готовые к запуску задачи и возвращает их число."""
+    reclaim_stale()
+    ready = Task.objects.filter(
+        status=Task.PENDING, run_after__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit]
+    done = 0
+    for pk in list(ready):
+        # Захват задачи одним UPDATE, чтобы два воркера её не разделили
+        claimed = Task.objects.filter(
+            pk=pk, status=Task.PENDING
+        ).update(status=Task.RUNNING, claimed_at=timezone.now())
+        if not claimed:
+            continue
+        run_task(Task.objects.get(pk=pk))
+        done += 1
+    return done
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.html import format_html
+
+from core.idempotency import TOKEN_FIELD, new_token
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_token():
+    return format_html(
+        '<input type="hidden" name="{}" value="{}">', TOKEN_FIELD, new_token())
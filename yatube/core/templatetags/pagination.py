@@ -0,0 +1,29 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям; None — пропуск.
+
+    Вместо ссылки на каждую из тысяч страниц выводится, например,
+    1 … 48 49 50 51 52 … 100000.
+    """
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    window = []
+    if number > on_each_side + on_ends + 1:
+        window += list(range(1, on_ends + 1)) + [None]
+        window += list(range(number - on_each_side, number))
+    else:
+        window += list(range(1, number))
+    if number < num_pages - on_each_side - on_ends:
+        window += list(range(number, number + on_each_side + 1))
+        window += [None] + list(
+            range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        window += list(range(number, num_pages + 1))
+    return window
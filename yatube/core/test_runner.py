@@ -0,0 +1,20 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты с одной итерацией PBKDF2.
+
+    Стойкость хешей в тестовой базе не нужна, а каждое создание
+    пользователя с паролем и вход иначе стоят десятки миллисекунд.
+    Для py.test то же делает фикстура в tests/conftest.py.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._fast_hashing = override_settings(PASSWORD_ITERATIONS=1)
+        self._fast_hashing.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._fast_hashing.disable()
+        super().teardown_test_environment(**kwargs)
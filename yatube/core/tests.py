@@ -0,0 +1,482 @@
+import os
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.core.signals import request_started
+from django.template import Context, Template
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post
+
+from . import routers, signals
+from .checks import check_session_cache
+from .cache import shared_cache
+from .context_processors.lazy import lazy_processor
+from .hashers import PBKDF2PasswordHasher
+from .idempotency import TOKEN_FIELD, new_token
+from .models import RateLimitCounter, Task
+from .paginator import CachedCountPaginator, EstimatedCountPaginator
+from .ratelimit import is_over_limit
+from .templatetags.pagination import page_window
+from .tasks import run_pending, task
+from .middleware import PRIMARY_PIN_COOKIE
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise ValueError('Ошибка')
+
+
+class SqlitePragmaTest(SimpleTestCase):
+    def test_new_connection_uses_wal(self):
+        """Новое соединение с файлом БД работает в режиме WAL."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            settings_dict = dict(
+                connections.databases['default'],
+                NAME=os.path.join(tmp_dir, 'wal.sqlite3'),
+            )
+            wrapper = DatabaseWrapper(settings_dict, alias='wal_check')
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    # 1 соответствует NORMAL
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                wrapper.close()
+
+
+class ConnectionHealthCheckTest(SimpleTestCase):
+    def make_connection(self, usable):
+        return mock.Mock(
+            connection=object(),
+            in_atomic_block=False,
+            **{'is_usable.return_value': usable}
+        )
+
+    def test_broken_connection_closed_on_request_start(self):
+        """Сломанное соединение закрывается перед запросом."""
+        broken = self.make_connection(usable=False)
+        alive = self.make_connection(usable=True)
+        with mock.patch.object(signals, 'connections') as handler:
+            handler.all.return_value = [broken, alive]
+            request_started.send(sender=self.__class__)
+        broken.close.assert_called_once_with()
+        alive.close.assert_not_called()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        routers.start_request()
+
+    def read_db_in_feed(self, model):
+        return routers.use_replica(
+            lambda: self.router.db_for_read(model))()
+
+    def test_feed_reads_go_to_replica(self):
+        """Лента внутри use_replica читается с реплики."""
+        self.assertEqual(self.read_db_in_feed(Post), 'replica_1')
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_other_apps_read_from_primary(self):
+        """Пользователи и сессии всегда читаются из основной базы."""
+        self.assertIsNone(self.read_db_in_feed(User))
+
+    def test_pinned_user_reads_from_primary(self):
+        """После записи пользователь читает из основной базы."""
+        routers.start_request(pinned=True)
+        self.assertIsNone(self.read_db_in_feed(Post))
+
+    def test_write_sets_pin_cookie(self):
+        """Запись в запросе закрепляет пользователя за основной базой."""
+        user = User.objects.create_user(username='Writer')
+        author = User.objects.create_user(username='Author')
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse('posts:profile_follow', args=(author.username,)))
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_shared_cache_write_not_pinned(self):
+        """Запись в общий кэш не закрепляет читателя за основной базой."""
+        shared_cache.set('pin_check', 1)
+        self.assertFalse(routers.has_written())
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delayed_task_runs_in_worker(self):
+        """Отложенная задача выполняется воркером ровно один раз."""
+        remember.delay(1)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_same_key_enqueued_once(self):
+        """Задача с тем же ключом не ставится повторно."""
+        remember.delay(1, key='remember:1')
+        remember.delay(1, key='remember:1')
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASKS_RETRY_DELAY=0)
+    def test_failing_task_retried_then_failed(self):
+        """Упавшая задача повторяется до исчерпания попыток."""
+        always_fails.delay()
+        with self.assertLogs('core.tasks', level='ERROR'):
+            run_pending()
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+        with self.assertLogs('core.tasks', level='ERROR'):
+            run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        """В режиме TASKS_EAGER задача выполняется сразу."""
+        remember.delay(2)
+        self.assertEqual(calls, [2])
+        self.assertFalse(Task.objects.exists())
+
+    def abandon(self, task_obj, attempts=0):
+        """Как будто воркер захватил задачу и умер."""
+        claimed_at = timezone.now() - timedelta(
+            seconds=settings.TASKS_LEASE_SECONDS + 1)
+        Task.objects.filter(pk=task_obj.pk).update(
+            status=Task.RUNNING, claimed_at=claimed_at, attempts=attempts)
+
+    def test_abandoned_task_requeued(self):
+        """Задачу упавшего воркера выполняет следующий воркер."""
+        self.abandon(remember.delay(3, key='remember:3'))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [3])
+        task_obj = Task.objects.get()
+        self.assertEqual(task_obj.status, Task.DONE)
+        self.assertEqual(task_obj.attempts, 2)
+
+    def test_running_task_within_lease_kept(self):
+        """Задачу, которая ещё выполняется, другой воркер не трогает."""
+        task_obj = remember.delay(4)
+        Task.objects.filter(pk=task_obj.pk).update(
+            status=Task.RUNNING, claimed_at=timezone.now())
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+
+    def test_abandoned_task_fails_after_attempts(self):
+        """Брошенная задача с исчерпанными попытками помечается ошибкой."""
+        self.abandon(always_fails.delay(), attempts=1)
+        with self.assertLogs('core.tasks', level='WARNING'):
+            self.assertEqual(run_pending(), 0)
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window_counts_previous_window(self):
+        """Запросы прошлого окна учитываются пропорционально."""
+        for _ in range(4):
+            self.assertFalse(is_over_limit('test', 4, 60, now=59))
+        # Половина прошлого окна (2) плюс текущий запрос
+        self.assertFalse(is_over_limit('test', 4, 60, now=90))
+        self.assertFalse(is_over_limit('test', 4, 60, now=90))
+        self.assertTrue(is_over_limit('test', 4, 60, now=90))
+
+    def test_limit_survives_process_cache_eviction(self):
+        """Вытеснение из кэша процесса не сбрасывает лимит."""
+        for _ in range(5):
+            over = is_over_limit('test', 4, 60, now=30)
+        self.assertTrue(over)
+        cache.set_many({f'post_card:{number}': '' for number in range(500)})
+        self.assertTrue(is_over_limit('test', 4, 60, now=30))
+
+    def test_counter_updated_in_one_statement(self):
+        """Прирост — один запрос, без отдельных чтения и записи."""
+        is_over_limit('test', 4, 60, now=30)
+        with CaptureQueriesContext(connection) as queries:
+            is_over_limit('test', 4, 60, now=31)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements, ['INSERT', 'SELECT'])
+        self.assertEqual(RateLimitCounter.objects.get().count, 2)
+
+    def test_old_windows_removed(self):
+        """Первый запрос в окне удаляет устаревшие окна ключа."""
+        for now in (30, 90, 150):
+            is_over_limit('test', 4, 60, now=now)
+        self.assertEqual(
+            list(RateLimitCounter.objects.order_by('window').values_list(
+                'window', flat=True)),
+            [1, 2])
+
+    @override_settings(RATE_LIMITS={
+        **settings.RATE_LIMITS, 'follow': {'user': (2, 60)}})
+    def test_too_many_follows_rejected(self):
+        """Превышение лимита подписок возвращает 429."""
+        user = User.objects.create_user(username='Follower')
+        author = User.objects.create_user(username='Author')
+        self.client.force_login(user)
+        url = reverse('posts:profile_follow', args=(author.username,))
+        for _ in range(2):
+            self.assertEqual(
+                self.client.get(url).status_code, HTTPStatus.FOUND)
+        response = self.client.get(url)
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+
+class IdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Author')
+        self.client.force_login(self.user)
+
+    def test_repeated_post_creates_once(self):
+        """Повторная отправка формы поста не создаёт дубликат."""
+        data = {'text': 'Тестовый текст', TOKEN_FIELD: new_token()}
+        first = self.client.post(reverse('posts:post_create'), data)
+        second = self.client.post(reverse('posts:post_create'), data)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertRedirects(second, first.url)
+
+    def test_token_not_lost_with_process_cache(self):
+        """Токен помнится, даже если повтор попал в другой воркер."""
+        data = {'text': 'Тестовый текст', TOKEN_FIELD: new_token()}
+        self.client.post(reverse('posts:post_create'), data)
+        # Кэш процесса другого воркера пуст
+        cache.clear()
+        self.client.post(reverse('posts:post_create'), data)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_repeated_comment_creates_once(self):
+        """Повторная отправка комментария не создаёт дубликат."""
+        post = Post.objects.create(text='Тестовый текст', author=self.user)
+        url = reverse('posts:add_comment', args=(post.pk,))
+        data = {'text': 'Комментарий', TOKEN_FIELD: new_token()}
+        self.client.post(url, data)
+        self.client.post(url, data)
+        self.assertEqual(post.comments.count(), 1)
+
+    def test_failed_request_can_be_retried(self):
+        """После исключения во view тот же токен можно отправить снова."""
+        data = {'text': 'Тестовый текст', TOKEN_FIELD: new_token()}
+        with mock.patch('posts.forms.PostForm.save',
+                        side_effect=RuntimeError('Ошибка')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('posts:post_create'), data)
+        response = self.client.post(reverse('posts:post_create'), data)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_invalid_form_can_be_resubmitted(self):
+        """После ошибки формы тот же токен можно отправить снова."""
+        token = new_token()
+        self.client.post(
+            reverse('posts:post_create'), {'text': '', TOKEN_FIELD: token})
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Тестовый текст', TOKEN_FIELD: token})
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_forms_contain_token(self):
+        """Формы поста и комментария содержат токен."""
+        post = Post.objects.create(text='Тестовый текст', author=self.user)
+        for url in (reverse('posts:post_create'),
+                    reverse('posts:post_detail', args=(post.pk,))):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), TOKEN_FIELD)
+
+
+class PageWindowTest(SimpleTestCase):
+    def get_window(self, number, count=1000000):
+        page = Paginator(range(count), 10).page(number)
+        return page_window(page)
+
+    def test_window_around_current_page(self):
+        """Выводятся края и соседние с текущей страницы."""
+        self.assertEqual(
+            self.get_window(50),
+            [1, None, 48, 49, 50, 51, 52, None, 100000])
+        self.assertEqual(
+            self.get_window(2), [1, 2, 3, 4, None, 100000])
+        self.assertEqual(
+            self.get_window(100000), [1, None, 99998, 99999, 100000])
+
+    def test_few_pages_shown_in_full(self):
+        """Если страниц мало, выводятся все."""
+        self.assertEqual(self.get_window(1, count=30), [1, 2, 3])
+
+
+@override_settings(PAGINATOR_COUNT_TIMEOUT=60)
+class CachedCountPaginatorTest(TestCase):
+    def test_count_cached(self):
+        """Число постов берётся из кэша, а не из COUNT(*)."""
+        cache.clear()
+        user = User.objects.create_user(username='Author')
+        Post.objects.create(text='Тестовый текст', author=user)
+        self.assertEqual(CachedCountPaginator(Post.objects.all(), 10).count, 1)
+        with self.assertNumQueries(0):
+            paginator = CachedCountPaginator(Post.objects.all(), 10)
+            self.assertEqual(paginator.count, 1)
+
+    def test_estimated_count(self):
+        """Без фильтров число строк оценивается по наибольшему pk."""
+        cache.clear()
+        user = User.objects.create_user(username='Author')
+        posts = [
+            Post.objects.create(text='Тестовый текст', author=user)
+            for _ in range(3)
+        ]
+        posts[0].delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, posts[-1].pk)
+        filtered = Post.objects.filter(text__contains='Тестовый')
+        self.assertEqual(EstimatedCountPaginator(filtered, 10).count, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(filtered, 10).count, 2)
+
+
+class SessionCacheCheckTest(SimpleTestCase):
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_sessions_over_database_cache_rejected(self):
+        """cached_db поверх DatabaseCache отклоняется проверкой."""
+        errors = check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        CACHES={**settings.CACHES, settings.SHARED_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.memcached.'
+                       'MemcachedCache'}})
+    def test_cached_sessions_over_memcached_allowed(self):
+        self.assertEqual(check_session_cache(None), [])
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class SessionTest(TestCase):
+    def test_logout_invalidates_copied_cookie(self):
+        """После выхода скопированная cookie сессии больше не работает."""
+        User.objects.create_user(username='Reader', password='pass')
+        self.client.login(username='Reader', password='pass')
+        copy = Client()
+        copy.cookies = SimpleCookie(self.client.cookies)
+        url = reverse('posts:follow_index')
+        self.assertEqual(copy.get(url).status_code, HTTPStatus.OK)
+        self.client.get(reverse('users:logout'))
+        self.assertEqual(copy.get(url).status_code, HTTPStatus.FOUND)
+
+    def test_clear_sessions_in_batches(self):
+        """Команда удаляет только просроченные сессии."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key=f'expired{number}', session_data='',
+                    expire_date=now - timedelta(days=1))
+            for number in range(5)
+        )
+        Session.objects.create(session_key='alive', session_data='',
+                               expire_date=now + timedelta(days=1))
+        call_command('clear_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive'])
+
+
+class PasswordHasherTest(TestCase):
+    def test_login_rehashes_to_current_iterations(self):
+        """При входе хеш пароля переводится на текущее число итераций."""
+        user = User.objects.create_user(username='Reader')
+        for iterations in (settings.PASSWORD_ITERATIONS + 1, 1000):
+            with self.subTest(iterations=iterations):
+                user.password = PBKDF2PasswordHasher().encode(
+                    'secret-pass', 'salt', iterations)
+                user.save()
+                self.client.post(reverse('users:login'), {
+                    'username': 'Reader', 'password': 'secret-pass'})
+                user.refresh_from_db()
+                self.assertTrue(user.password.startswith(
+                    f'pbkdf2_sha256${settings.PASSWORD_ITERATIONS}$'))
+
+
+class LazyContextProcessorTest(TestCase):
+    def render(self, source, processor):
+        context = Context(processor(None))
+        return Template(source).render(context)
+
+    def test_value_computed_only_when_used(self):
+        """Фабрика не вызывается, если шаблон не выводит переменную,
+        и вызывается один раз на рендер, если выводит."""
+        factory = mock.Mock(return_value=2024)
+        processor = lazy_processor(year=factory)
+        self.assertEqual(self.render('Без года', processor), 'Без года')
+        factory.assert_not_called()
+        self.assertEqual(
+            self.render('{{ year }} {{ year }}', processor), '2024 2024')
+        factory.assert_called_once_with(None)
+
+    def test_year_in_footer(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'© {timezone.now().year} Copyright')
+
+
+class SqliteStressTest(TransactionTestCase):
+    # Копия снимается резервным копированием SQLite, которое ждёт
+    # завершения открытой транзакции, поэтому данные теста закоммичены
+
+    def tearDown(self):
+        # Общий кэш живёт в таблице, которую flush не очищает
+        shared_cache.clear()
+
+    def test_stress_uses_copy_without_lock_errors(self):
+        """Нагрузка идёт на копию базы и не получает "database is locked"."""
+        Post.objects.create(
+            text='Рабочий пост',
+            author=User.objects.create_user(username='Author'))
+        out = StringIO()
+        call_command(
+            'sqlite_stress', readers=2, writers=2, seconds=0.5, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertTrue(line.endswith('ошибок блокировки: 0'))
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(
+            User.objects.filter(username='sqlite_stress').exists())
@@ -1,6 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.shortcuts import render
 
+from core.admin import message_task_queued
+from core.paginator import EstimatedCountPaginator
+
+from .forms import MoveToGroupForm
 from .models import Comment, Follow, Group, Post
+from .tasks import delete_posts, move_posts
+
+
+def selected_ids(queryset):
+    return list(queryset.values_list('pk', flat=True))
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -8,11 +19,51 @@ class PostAdmin(admin.ModelAdmin):
                     'text',
                     'pub_date',
                     'author',
-                    'group')
-    list_editable = ['group']
+                    'group',
+                    'view_count')
+    list_select_related = ('author', 'group')
     search_fields = ['text']
     list_filter = ['pub_date']
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ['author']
+    autocomplete_fields = ['group']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = ['move_to_group', 'delete_in_background']
+
+    def get_actions(self, request):
+        # Стандартное удаление собирает все связанные объекты в памяти
+        # и удаляет их по одному в рамках запроса
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'apply' in request.POST
+                               else None)
+        if form.is_valid():
+            group = form.cleaned_data['group']
+            task_obj = move_posts.delay(
+                selected_ids(queryset), group.pk if group else None)
+            message_task_queued(self, request, task_obj)
+            return None
+        return render(request, 'admin/posts/post/move_to_group.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Перенос постов в группу',
+            'opts': self.model._meta,
+            'form': form,
+            'select_across': request.POST.get('select_across'),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'count': queryset.count(),
+        })
+    move_to_group.short_description = 'Перенести в группу (в фоне)'
+
+    def delete_in_background(self, request, queryset):
+        task_obj = delete_posts.delay(selected_ids(queryset))
+        message_task_queued(self, request, task_obj)
+    delete_in_background.short_description = 'Удалить (в фоне)'
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -20,7 +71,7 @@ class GroupAdmin(admin.ModelAdmin):
                     'title',
                     'slug',
                     'description')
-    search_fields = ['description']
+    search_fields = ['title', 'slug', 'description']
     list_filter = ['title']
     empty_value_display = '-пусто-'
 
@@ -31,12 +82,19 @@ class CommentAdmin(admin.ModelAdmin):
                     'author',
                     'text',
                     'created')
+    list_select_related = ('post', 'author')
+    date_hierarchy = 'created'
+    raw_id_fields = ['post', 'author']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk',
                     'user',
                     'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ['user', 'author']
 
 
 admin.site.register(Group, GroupAdmin)
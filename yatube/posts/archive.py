@@ -0,0 +1,114 @@
+"""Архив постов по месяцам для сайта, авторов и групп.
+
+Число постов за месяц хранится в PostMonth: новый пост увеличивает
+счётчики одним UPDATE на ленту, удаление и перенос в другую группу
+пересчитывают затронутый месяц запросом по индексу pub_date.
+"""
+from collections import Counter
+from datetime import date, datetime, time
+
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Post, PostMonth
+
+SITE_SCOPE = 'site'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def post_scopes(author_id, group_id):
+    scopes = [SITE_SCOPE, author_scope(author_id)]
+    if group_id:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def scope_filter(scope):
+    """Условие на посты ленты по её scope."""
+    if scope == SITE_SCOPE:
+        return {}
+    kind, pk = scope.split(':')
+    return {f'{kind}_id': int(pk)}
+
+
+def month_start(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def next_month(month):
+    """Первое число следующего месяца; None после декабря 9999 года."""
+    if month.month < 12:
+        return month.replace(month=month.month + 1)
+    if month.year < date.max.year:
+        return month.replace(year=month.year + 1, month=1)
+    return None
+
+
+def month_range(month):
+    """Границы месяца для запроса по pub_date.
+
+    У последнего представимого месяца верхней границы нет (None).
+    """
+    start = timezone.make_aware(datetime.combine(month, time.min))
+    end_month = next_month(month)
+    if end_month is None:
+        return start, None
+    return start, timezone.make_aware(datetime.combine(end_month, time.min))
+
+
+def month_posts(scope, month):
+    start, end = month_range(month)
+    posts = Post.objects.filter(pub_date__gte=start, **scope_filter(scope))
+    if end is not None:
+        posts = posts.filter(pub_date__lt=end)
+    return posts
+
+
+def refresh_month(scope, month):
+    total = month_posts(scope, month).count()
+    if total:
+        PostMonth.objects.update_or_create(
+            scope=scope, month=month, defaults={'post_count': total})
+    else:
+        PostMonth.objects.filter(scope=scope, month=month).delete()
+
+
+def archive_post_added(post):
+    month = month_start(post.pub_date)
+    for scope in post_scopes(post.author_id, post.group_id):
+        updated = PostMonth.objects.filter(scope=scope, month=month).update(
+            post_count=F('post_count') + 1)
+        if not updated:
+            refresh_month(scope, month)
+
+
+def refresh_post_months(post, scopes):
+    """Пересчитывает месяц поста в перечисленных лентах."""
+    month = month_start(post.pub_date)
+    for scope in scopes:
+        refresh_month(scope, month)
+
+
+def rebuild_archive():
+    """Пересчитывает весь архив одним группирующим запросом."""
+    rows = Post.objects.annotate(
+        month=TruncMonth('pub_date', output_field=DateField())
+    ).order_by().values('author_id', 'group_id', 'month').annotate(
+        total=Count('pk'))
+    counts = Counter()
+    for row in rows:
+        for scope in post_scopes(row['author_id'], row['group_id']):
+            counts[scope, row['month']] += row['total']
+    PostMonth.objects.all().delete()
+    PostMonth.objects.bulk_create(
+        PostMonth(scope=scope, month=month, post_count=total)
+        for (scope, month), total in counts.items()
+    )
@@ -0,0 +1,96 @@
+"""Массовые операции над постами для фоновых задач админки.
+
+Посты меняются и удаляются пачками по BULK_BATCH_SIZE одним UPDATE
+или DELETE на пачку, без загрузки объектов и сигналов на каждый пост.
+Денормализованные данные (статистика групп, архив по месяцам, отметки
+RSS-лент и версия ленты) пересчитываются после каждой пачки один раз
+для всех затронутых групп, авторов и месяцев, поэтому прерванная
+задача не оставляет их рассогласованными.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core.tasks import set_progress
+
+from . import archive, feeds
+from .fragments import bump_feed_version
+from .group_stats import refresh_group_stats
+from .models import Comment, Group, Notification, Post, TrendingPost
+
+User = get_user_model()
+
+BULK_BATCH_SIZE = 1000
+
+
+class Affected:
+    """Группы, авторы и месяцы, задетые массовой операцией."""
+
+    def __init__(self):
+        self.group_ids = set()
+        self.author_ids = set()
+        self.months = set()
+
+    def add(self, posts, scopes):
+        """Запоминает посты; scopes(author_id, group_id) — их ленты
+        в архиве, которые нужно пересчитать."""
+        rows = posts.values_list('author_id', 'group_id', 'pub_date')
+        for author_id, group_id, pub_date in rows:
+            self.author_ids.add(author_id)
+            if group_id:
+                self.group_ids.add(group_id)
+            month = archive.month_start(pub_date)
+            for scope in scopes(author_id, group_id):
+                self.months.add((scope, month))
+
+    def refresh(self):
+        for group_id in self.group_ids:
+            refresh_group_stats(group_id)
+        for scope, month in self.months:
+            archive.refresh_month(scope, month)
+        usernames = User.objects.filter(
+            pk__in=self.author_ids).values_list('username', flat=True)
+        slugs = Group.objects.filter(
+            pk__in=self.group_ids).values_list('slug', flat=True)
+        feeds.touch_feeds(
+            feeds.SITE_SCOPE,
+            *map(feeds.author_scope, usernames),
+            *map(feeds.group_scope, slugs),
+        )
+        bump_feed_version()
+
+
+def move_batch(post_ids, group_id, affected):
+    """Переносит пачку постов в группу."""
+    def scopes(author_id, old_group_id):
+        return {
+            archive.group_scope(pk) for pk in (old_group_id, group_id) if pk
+        }
+
+    posts = Post.objects.filter(pk__in=post_ids)
+    with transaction.atomic():
+        affected.add(posts, scopes)
+        posts.update(group_id=group_id)
+    if group_id:
+        affected.group_ids.add(group_id)
+
+
+def delete_batch(post_ids, affected):
+    """Удаляет пачку постов вместе с комментариями и уведомлениями."""
+    posts = Post.objects.filter(pk__in=post_ids)
+    with transaction.atomic():
+        affected.add(posts, archive.post_scopes)
+        for model in (Comment, Notification, TrendingPost):
+            model.objects.filter(post_id__in=post_ids).delete()
+        # Зависимые строки уже удалены, поэтому посты удаляются одним
+        # DELETE без обхода связей и сигналов post_delete
+        posts._raw_delete(posts.db)
+
+
+def run_in_batches(post_ids, apply):
+    """Применяет apply(batch, affected) к постам пачками с прогрессом."""
+    total = len(post_ids)
+    for start in range(0, total, BULK_BATCH_SIZE):
+        affected = Affected()
+        apply(post_ids[start:start + BULK_BATCH_SIZE], affected)
+        affected.refresh()
+        set_progress(min(start + BULK_BATCH_SIZE, total), total)
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_key(post):
+    """Ключ карточки поста.
+
+    В ключ входят дата изменения поста, имя автора и группа, поэтому
+    правка поста, смена имени автора или группы сами дают новый ключ
+    без отдельной очистки кэша.
+    """
+    author = post.author
+    group = post.group
+    parts = (
+        post.updated.isoformat(),
+        author.username,
+        author.get_full_name(),
+        group.slug if group else '',
+        group.title if group else '',
+    )
+    digest = hashlib.md5('\n'.join(parts).encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def render_cards(posts):
+    """Список карточек постов.
+
+    Готовые карточки берутся из кэша одним get_many, недостающие
+    рендерятся и сохраняются одним set_many.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {
+        key: render_to_string(CARD_TEMPLATE, {'post': post})
+        for key, post in zip(keys, posts)
+        if key not in cards
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
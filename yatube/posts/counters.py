@@ -0,0 +1,101 @@
+"""Буферизованный счётчик просмотров постов.
+
+Каждый просмотр только увеличивает счётчик в памяти процесса. В базу
+накопленные просмотры попадают пачкой: одним UPDATE на каждое
+встретившееся значение прироста. Сброс происходит при очередном
+просмотре, если с прошлого прошло VIEW_COUNTER_FLUSH_SECONDS или
+накопилось VIEW_COUNTER_MAX_PENDING просмотров. В воркерах сайта
+(yatube/wsgi.py) просмотры без новых запросов сбрасывает фоновый
+поток, а остаток пишется при штатном завершении процесса.
+Ошибка базы при сбросе не ломает просмотр поста: просмотры
+возвращаются в буфер до следующей попытки. Если процесс упадёт,
+потеряются только просмотры, накопленные с последнего сброса.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import F
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.last_flush = time.monotonic()
+        # pid процесса, в котором работает фоновый поток: после fork
+        # (gunicorn --preload) поток в воркере нужно запустить заново
+        self.flusher_pid = None
+
+    def hit(self, post_id):
+        with self.lock:
+            self.pending[post_id] += 1
+            due = (
+                sum(self.pending.values()) >= settings.VIEW_COUNTER_MAX_PENDING
+                or time.monotonic() - self.last_flush
+                >= settings.VIEW_COUNTER_FLUSH_SECONDS
+            )
+        if self.flusher_pid not in (None, os.getpid()):
+            self.start()
+        if due:
+            self.flush()
+
+    def start(self):
+        """Запускает фоновый сброс и сброс при выходе из процесса."""
+        with self.lock:
+            if self.flusher_pid == os.getpid():
+                return
+            self.flusher_pid = os.getpid()
+        threading.Thread(
+            target=self.run_flusher, name='view-counter', daemon=True
+        ).start()
+        atexit.register(self.flush)
+
+    def run_flusher(self):
+        while True:
+            time.sleep(settings.VIEW_COUNTER_FLUSH_SECONDS)
+            if time.monotonic() - self.last_flush < (
+                    settings.VIEW_COUNTER_FLUSH_SECONDS):
+                continue
+            try:
+                self.flush()
+            finally:
+                # Соединение потока не должно висеть между сбросами
+                connections[DEFAULT_DB_ALIAS].close()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.write(pending)
+        except DatabaseError:
+            logger.exception('Не удалось записать просмотры постов')
+            with self.lock:
+                self.pending.update(pending)
+
+    def write(self, pending):
+        by_increment = defaultdict(list)
+        for post_id, increment in pending.items():
+            by_increment[increment].append(post_id)
+        # Запись просмотров не должна закреплять читателя
+        # за основной базой, поэтому alias указан явно
+        posts = Post.objects.using(DEFAULT_DB_ALIAS)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            for increment, post_ids in by_increment.items():
+                posts.filter(pk__in=post_ids).update(
+                    view_count=F('view_count') + increment)
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,232 @@
+"""RSS и Atom ленты сайта, групп и авторов.
+
+Для каждой ленты в общем кэше (core.cache) хранится отметка времени
+последнего изменения: её обновляют сигналы при записи постов в любом
+воркере. По ней отдаются ETag и Last-Modified, поэтому опрос без
+изменений не трогает таблицы постов, а готовый XML ленты кэшируется
+в процессе под ключом с отметкой до следующего изменения.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from core.cache import shared_cache
+
+from .models import Group, Post
+
+User = get_user_model()
+
+SITE_SCOPE = 'site'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def stamp_key(scope):
+    return f'feed_stamp:{scope}'
+
+
+def touch_feeds(*scopes):
+    """Отмечает ленты изменёнными."""
+    now = time.time()
+    shared_cache.set_many(
+        {stamp_key(scope): now for scope in scopes}, None)
+
+
+def touch_post_feeds(post, *group_ids):
+    """Отмечает изменёнными ленты, в которые попадает пост."""
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk]
+    ).values_list('slug', flat=True)
+    touch_feeds(
+        SITE_SCOPE,
+        author_scope(post.author.username),
+        *(group_scope(slug) for slug in slugs)
+    )
+
+
+def touch_author_feeds(author, *usernames):
+    """Отмечает изменёнными ленты с постами автора после смены имени."""
+    slugs = Group.objects.filter(
+        posts__author=author).values_list('slug', flat=True).distinct()
+    touch_feeds(
+        SITE_SCOPE,
+        *(author_scope(username) for username in usernames),
+        *(group_scope(slug) for slug in slugs)
+    )
+
+
+def touch_group_feeds(group, *slugs):
+    """Отмечает изменёнными ленты с постами группы после её правки.
+
+    Название группы выводится в категориях постов, поэтому меняются
+    и общая лента, и ленты авторов группы.
+    """
+    usernames = User.objects.filter(
+        posts__group=group).values_list('username', flat=True).distinct()
+    touch_feeds(
+        SITE_SCOPE,
+        *(group_scope(slug) for slug in slugs),
+        *(author_scope(username) for username in usernames)
+    )
+
+
+def get_stamp(scope, exists=None):
+    """Отметка изменения ленты.
+
+    Если отметки нет (лента ещё не опрашивалась или отметку вытеснили),
+    лента считается изменённой сейчас. Для несуществующей группы или
+    автора (exists() ложно) отметка не заводится и возвращается None.
+    """
+    stamp = shared_cache.get(stamp_key(scope))
+    if stamp is None:
+        if exists is not None and not exists():
+            return None
+        shared_cache.add(stamp_key(scope), time.time(), None)
+        stamp = shared_cache.get(stamp_key(scope))
+    return stamp
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты на сайте Yatube'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related(
+            'author', 'group')[:settings.FEED_SIZE]
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group else ()
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: группа {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=(obj.slug,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: посты {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+def atom(feed_class):
+    return type(
+        f'Atom{feed_class.__name__}',
+        (feed_class,),
+        {'feed_type': Atom1Feed, 'subtitle': feed_class.description},
+    )
+
+
+def feed_scope(kwargs):
+    if 'slug' in kwargs:
+        return group_scope(kwargs['slug'])
+    if 'username' in kwargs:
+        return author_scope(kwargs['username'])
+    return SITE_SCOPE
+
+
+def scope_exists(kwargs):
+    """Проверка существования группы или автора ленты; None для общей."""
+    if 'slug' in kwargs:
+        return Group.objects.filter(slug=kwargs['slug']).exists
+    if 'username' in kwargs:
+        return User.objects.filter(username=kwargs['username']).exists
+    return None
+
+
+def cached_feed(feed_class):
+    """View ленты с условными ответами и кэшем готового XML."""
+    feed = feed_class()
+    name = feed_class.__name__
+
+    def stamp(kwargs):
+        return get_stamp(feed_scope(kwargs), scope_exists(kwargs))
+
+    def etag(request, **kwargs):
+        value = stamp(kwargs)
+        if value is None:
+            return None
+        return hashlib.md5(
+            f'{name}:{feed_scope(kwargs)}:{value}'.encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        value = stamp(kwargs)
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, **kwargs):
+        tag = etag(request, **kwargs)
+        if tag is None:
+            # Группы или автора нет: Feed ответит 404
+            return feed(request, **kwargs)
+        key = f'feed:{tag}'
+        response = cache.get(key)
+        if response is None:
+            response = feed(request, **kwargs)
+            # Feed ставит дату последнего поста, а правки постов её
+            # не меняют; Last-Modified выставит condition по отметке
+            del response['Last-Modified']
+            cache.set(key, response, settings.FEED_CACHE_TIMEOUT)
+        return response
+    return view
@@ -1,29 +1,91 @@
 from django import forms
+from django.forms.utils import flatatt
+from django.utils.html import format_html
 
-from .models import Comment, Post
+from .group_catalog import get_group_choices, get_group_options_html
+from .models import Comment, Group, Post
+
+
+class CachedGroupChoiceIterator(forms.models.ModelChoiceIterator):
+    """Берёт варианты групп из кэша вместо запроса к базе."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        yield from get_group_choices()
+
+    def __len__(self):
+        return (len(get_group_choices())
+                + (self.field.empty_label is not None))
+
+
+class GroupSelect(forms.Select):
+    """Список групп из заранее собранного HTML.
+
+    Шаблонный рендер Select обходит каждый вариант через шаблон
+    и при тысячах групп занимает сотни миллисекунд.
+    """
+
+    def render(self, name, value, attrs=None, renderer=None):
+        final_attrs = self.build_attrs(self.attrs, attrs)
+        final_attrs['name'] = name
+        selected = '' if value is None else str(value)
+        return format_html(
+            '<select{}><option value=""{}>---------</option>{}</select>',
+            flatatt(final_attrs),
+            '' if selected else ' selected',
+            get_group_options_html(selected),
+        )
 
 
 class PostForm(forms.ModelForm):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        widget=GroupSelect,
+        label='Группа',
+        help_text='Выберете группу'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group_field = self.fields['group']
+        group_field.iterator = CachedGroupChoiceIterator
+        group_field.widget.choices = group_field.choices
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
-        group = forms.ModelChoiceField(queryset=Post.objects.all(),
-                                       required=False, to_field_name='group')
         widgets = {
             'text': forms.Textarea(),
         }
 
         labels = {
-            'group': 'Группа',
             'text': 'Текст'
         }
 
         help_texts = {
-            'group': 'Выберете группу',
             'text': 'Введите текст'
         }
 
 
+class MoveToGroupForm(forms.Form):
+    """Выбор группы для массового переноса постов в админке."""
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        widget=GroupSelect,
+        label='Группа',
+        help_text='Пустое значение уберёт посты из групп'
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group_field = self.fields['group']
+        group_field.iterator = CachedGroupChoiceIterator
+        group_field.widget.choices = group_field.choices
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
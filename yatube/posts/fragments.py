@@ -0,0 +1,26 @@
+"""Версия закэшированных фрагментов ленты.
+
+Номер версии входит в ключ {% cache %} списка постов, поэтому любая
+запись поста делает все страницы ленты устаревшими одним shared_cache.set,
+без перебора ключей каждой страницы. Сами фрагменты лежат в кэше
+процесса, а версия — в общем кэше (core.cache), чтобы её смену
+увидели все воркеры.
+"""
+from uuid import uuid4
+
+from core.cache import shared_cache
+
+FEED_VERSION_KEY = 'feed_fragment_version'
+
+
+def get_feed_version():
+    version = shared_cache.get(FEED_VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not shared_cache.add(FEED_VERSION_KEY, version, None):
+            version = shared_cache.get(FEED_VERSION_KEY, version)
+    return version
+
+
+def bump_feed_version():
+    shared_cache.set(FEED_VERSION_KEY, uuid4().hex, None)
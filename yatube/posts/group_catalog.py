@@ -0,0 +1,57 @@
+"""Кэш списка групп для форм и шаблонов.
+
+Список (pk, название) и готовый HTML тегов <option> хранятся в памяти
+процесса вместе с номером версии. Номер лежит в общем для всех
+воркеров кэше (core.cache) и меняется при сохранении или удалении
+группы, поэтому остальные процессы тоже заметят изменение, сделав лишь
+одно чтение из общего кэша вместо запроса списка групп.
+"""
+import threading
+from uuid import uuid4
+
+from django.utils.html import format_html, format_html_join
+
+from core.cache import shared_cache
+
+from .models import Group
+
+VERSION_KEY = 'group_catalog_version'
+
+_lock = threading.Lock()
+_catalog = {'version': None, 'choices': [], 'options_html': ''}
+
+
+def load_catalog():
+    version = shared_cache.get(VERSION_KEY)
+    if version is None:
+        # Версия вытеснена из кэша: считаем, что список мог измениться
+        shared_cache.add(VERSION_KEY, uuid4().hex, timeout=None)
+        version = shared_cache.get(VERSION_KEY)
+    if _catalog['version'] != version:
+        choices = [
+            (group.pk, str(group))
+            for group in Group.objects.order_by('title').only('title')
+        ]
+        options_html = format_html_join(
+            '', '<option value="{}">{}</option>', choices)
+        with _lock:
+            _catalog.update(version=version, choices=choices,
+                            options_html=options_html)
+    return _catalog
+
+
+def get_group_choices():
+    return load_catalog()['choices']
+
+
+def get_group_options_html(selected=None):
+    """HTML вариантов выбора группы с отмеченной группой selected."""
+    options_html = load_catalog()['options_html']
+    if selected in (None, ''):
+        return options_html
+    marker = format_html('<option value="{}"', selected)
+    return options_html.replace(marker, marker + ' selected', 1)
+
+
+def invalidate_group_catalog():
+    shared_cache.set(VERSION_KEY, uuid4().hex, timeout=None)
@@ -0,0 +1,34 @@
+"""Денормализованная статистика групп для каталога групп.
+
+Новый пост в группе увеличивает счётчик одним UPDATE. Перенос поста
+в другую группу и удаление пересчитывают статистику затронутых групп
+запросом по индексу group_id.
+"""
+from django.db.models import Count, F, Max
+
+from .models import Group, GroupStats, Post
+
+
+def refresh_group_stats(group_id):
+    stats = Post.objects.filter(group_id=group_id).aggregate(
+        post_count=Count('pk'), last_post=Max('pub_date'))
+    GroupStats.objects.update_or_create(group_id=group_id, defaults=stats)
+
+
+def post_added(post):
+    updated = GroupStats.objects.filter(group_id=post.group_id).update(
+        post_count=F('post_count') + 1, last_post=post.pub_date)
+    if not updated:
+        refresh_group_stats(post.group_id)
+
+
+def rebuild_group_stats():
+    """Пересчитывает статистику всех групп одним запросом."""
+    groups = Group.objects.annotate(
+        total=Count('posts'), latest=Max('posts__pub_date'))
+    GroupStats.objects.all().delete()
+    GroupStats.objects.bulk_create(
+        GroupStats(group=group, post_count=group.total,
+                   last_post=group.latest)
+        for group in groups
+    )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Собирает файлы sitemap в SITEMAP_ROOT. Запускается '
+            'по расписанию; файлы постов переписываются, только если '
+            'изменились.')
+
+    def handle(self, *args, **options):
+        total, written = build_sitemaps()
+        self.stdout.write(
+            f'Файлов sitemap: {total}, переписано файлов постов: {written}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import compute_recommendations
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации авторов для подписки. '
+            'Запускается по расписанию, например раз в сутки.')
+
+    def handle(self, *args, **options):
+        count = compute_recommendations()
+        self.stdout.write(f'Рекомендаций сохранено: {count}')
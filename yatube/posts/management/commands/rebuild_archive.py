@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import rebuild_archive
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает число постов по месяцам для архива.'
+
+    def handle(self, *args, **options):
+        rebuild_archive()
+        self.stdout.write('Архив пересчитан')
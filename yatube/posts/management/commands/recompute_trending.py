@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import recompute_trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярных постов. '
+            'Запускается по расписанию, например раз в 10 минут.')
+
+    def handle(self, *args, **options):
+        count = recompute_trending()
+        self.stdout.write(f'В рейтинге постов: {count}')
@@ -0,0 +1,55 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from posts.models import Notification
+
+
+class Command(BaseCommand):
+    help = ('Рассылает подписчикам дайджесты новых постов. '
+            'Запускается по расписанию, например раз в час из cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько писем отправлять за одно обращение к backend.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = list(Notification.objects.order_by(
+            'user_id').values_list('user_id', flat=True).distinct())
+        connection = get_connection()
+        total = 0
+        for start in range(0, len(user_ids), batch_size):
+            notifications = Notification.objects.filter(
+                user_id__in=user_ids[start:start + batch_size]
+            ).select_related('user', 'post__author')
+            messages = [
+                self.build_message(user, list(items))
+                for user, items in groupby(notifications, lambda n: n.user)
+                if user.email
+            ]
+            total += self.flush(
+                connection, messages, [n.pk for n in notifications])
+        self.stdout.write(f'Отправлено дайджестов: {total}')
+
+    def build_message(self, user, notifications):
+        body = render_to_string('posts/email/digest.txt', {
+            'user': user,
+            'posts': [notification.post for notification in notifications],
+        })
+        return EmailMessage(
+            subject='Новые посты авторов, на которых вы подписаны',
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+
+    def flush(self, connection, messages, sent_ids):
+        """Отправляет пачку писем одним соединением и снимает уведомления."""
+        sent = connection.send_messages(messages) if messages else 0
+        Notification.objects.filter(pk__in=sent_ids).delete()
+        return sent or 0
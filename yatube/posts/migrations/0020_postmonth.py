@@ -0,0 +1,68 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:52
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def fill_post_months(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostMonth = apps.get_model('posts', 'PostMonth')
+    rows = Post.objects.annotate(
+        month=TruncMonth('pub_date', output_field=models.DateField())
+    ).order_by().values('author_id', 'group_id', 'month').annotate(
+        total=models.Count('pk'))
+    counts = Counter()
+    for row in rows:
+        scopes = ['site', f'author:{row["author_id"]}']
+        if row['group_id']:
+            scopes.append(f'group:{row["group_id"]}')
+        for scope in scopes:
+            counts[scope, row['month']] += row['total']
+    PostMonth.objects.bulk_create(
+        PostMonth(scope=scope, month=month, post_count=total)
+        for (scope, month), total in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostMonth',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('month', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Месяц архива',
+                'verbose_name_plural': 'Месяцы архива',
+                'ordering': ['scope', '-month'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='posts_post_author__7827da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='posts_post_group_i_1fdac4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postmonth',
+            constraint=models.UniqueConstraint(fields=('scope', 'month'), name='unique_post_month'),
+        ),
+        migrations.RunPython(fill_post_months, migrations.RunPython.noop),
+    ]
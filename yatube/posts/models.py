@@ -36,8 +36,13 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменён'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -60,9 +65,18 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    view_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры'
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['author', '-pub_date']),
+            models.Index(fields=['group', '-pub_date']),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -76,7 +90,7 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='comments', null=True)
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         verbose_name = 'Комментарий'
@@ -94,3 +108,77 @@ class Follow(models.Model):
             fields=['user', 'author'], name='unique_follow')]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class Notification(models.Model):
+    """Новый пост автора, о котором ещё не написали подписчику."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='notifications')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='notifications')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['user', 'pk']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+
+class TrendingPost(models.Model):
+    """Заранее посчитанный рейтинг популярных постов."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                primary_key=True, related_name='trending')
+    score = models.FloatField(db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+
+
+class FollowRecommendation(models.Model):
+    """Автор, на которого пользователю стоит подписаться."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='recommendations')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['user', '-score']
+        indexes = [models.Index(fields=['user', '-score'])]
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'], name='unique_recommendation')]
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+
+class GroupStats(models.Model):
+    """Число постов группы и дата последнего, обновляемые при записи."""
+    group = models.OneToOneField(Group, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    last_post = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+
+class PostMonth(models.Model):
+    """Число постов за месяц в ленте сайта, автора или группы.
+
+    scope — 'site', 'author:<id>' или 'group:<id>', month — первое число
+    месяца. Строки обновляются при записи постов.
+    """
+    scope = models.CharField(max_length=50)
+    month = models.DateField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['scope', '-month']
+        constraints = [models.UniqueConstraint(
+            fields=['scope', 'month'], name='unique_post_month')]
+        verbose_name = 'Месяц архива'
+        verbose_name_plural = 'Месяцы архива'
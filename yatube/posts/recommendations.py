@@ -0,0 +1,100 @@
+"""Рекомендации «на кого подписаться», считаемые пакетно.
+
+Граф подписок и активность авторов в группах загружаются целиком
+в словари множеств (разреженные матрицы смежности), после чего для
+каждого пользователя складываются три сигнала:
+
+* друзья друзей — авторы, на которых подписаны мои авторы;
+* совместные подписки — авторы, на которых подписаны люди,
+  читающие тех же авторов, что и я;
+* общие группы — авторы, пишущие в группы моих авторов.
+
+Результат — топ FOLLOW_RECOMMENDATIONS_LIMIT авторов на пользователя
+в таблице FollowRecommendation.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowRecommendation, Post
+
+FRIEND_OF_FRIEND_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+GROUP_WEIGHT = 0.2
+
+
+def load_graph():
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    author_groups = defaultdict(set)
+    group_authors = defaultdict(set)
+    for author_id, group_id in Post.objects.filter(
+        group__isnull=False
+    ).values_list('author_id', 'group_id').distinct().iterator():
+        author_groups[author_id].add(group_id)
+        group_authors[group_id].add(author_id)
+    return following, followers, author_groups, group_authors
+
+
+def co_follow_counts(author_id, following, followers, memo):
+    """Сколько читателей автора подписано на каждого кандидата.
+
+    Считается один раз на автора и запоминается в memo: иначе каждый
+    из R читателей популярного автора заново обходил бы подписки всех
+    остальных его читателей.
+    """
+    counts = memo.get(author_id)
+    if counts is None:
+        counts = Counter()
+        for reader in followers[author_id]:
+            counts.update(following[reader])
+        memo[author_id] = counts
+    return counts
+
+
+def score_user(user_id, following, followers, author_groups, group_authors,
+               co_follow=None):
+    if co_follow is None:
+        co_follow = {}
+    mine = following[user_id]
+    scores = Counter()
+    for author_id in mine:
+        for candidate in following[author_id]:
+            scores[candidate] += FRIEND_OF_FRIEND_WEIGHT
+        # Нормирую на число прочих читателей, чтобы популярные авторы
+        # не заглушали остальные сигналы. Вклад самого пользователя
+        # в счётчик приходится на его подписки, а они исключаются ниже
+        readers = len(followers[author_id]) - 1
+        if readers:
+            counts = co_follow_counts(
+                author_id, following, followers, co_follow)
+            for candidate, count in counts.items():
+                scores[candidate] += CO_FOLLOW_WEIGHT * count / readers
+        for group_id in author_groups[author_id]:
+            for candidate in group_authors[group_id]:
+                scores[candidate] += GROUP_WEIGHT
+    for excluded in mine | {user_id}:
+        scores.pop(excluded, None)
+    return scores.most_common(settings.FOLLOW_RECOMMENDATIONS_LIMIT)
+
+
+def compute_recommendations():
+    """Пересчитывает таблицу рекомендаций и возвращает число строк."""
+    graph = load_graph()
+    following = graph[0]
+    co_follow = {}
+    rows = [
+        FollowRecommendation(user_id=user_id, author_id=author_id,
+                             score=score)
+        for user_id in list(following)
+        for author_id, score in score_user(user_id, *graph, co_follow)
+    ]
+    with transaction.atomic():
+        FollowRecommendation.objects.all().delete()
+        FollowRecommendation.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .archive import (archive_post_added, group_scope, post_scopes,
+                      refresh_post_months)
+from .feeds import touch_author_feeds, touch_group_feeds, touch_post_feeds
+from .fragments import bump_feed_version
+from .group_catalog import invalidate_group_catalog
+from .group_stats import post_added, refresh_group_stats
+from .models import Comment, Group, Post, PostMonth
+from .trending import update_post_score
+
+User = get_user_model()
+
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def author_names(user):
+    # Через __dict__, чтобы не догружать отложенные (only/defer) поля
+    return tuple(user.__dict__.get(field) for field in AUTHOR_NAME_FIELDS)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Обновляет рейтинг поста при новом комментарии."""
+    if created and instance.post_id:
+        update_post_score(instance.post)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    """Запоминает группу поста, чтобы заметить её смену в post_edit."""
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Обновляет статистику групп и архив при создании и переносе поста."""
+    if created:
+        if instance.group_id:
+            post_added(instance)
+        archive_post_added(instance)
+    elif instance._saved_group_id != instance.group_id:
+        group_ids = [
+            group_id
+            for group_id in (instance._saved_group_id, instance.group_id)
+            if group_id
+        ]
+        for group_id in group_ids:
+            refresh_group_stats(group_id)
+        refresh_post_months(instance, map(group_scope, group_ids))
+    touch_post_feeds(instance, instance._saved_group_id, instance.group_id)
+    bump_feed_version()
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Обновляет статистику группы, архив и ленты удалённого поста."""
+    if instance.group_id:
+        refresh_group_stats(instance.group_id)
+    refresh_post_months(
+        instance, post_scopes(instance.author_id, instance.group_id))
+    touch_post_feeds(instance, instance.group_id)
+    bump_feed_version()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    """Сбрасывает кэш списка групп и ленты с названиями групп."""
+    invalidate_group_catalog()
+    bump_feed_version()
+
+
+@receiver(post_init, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    """Запоминает адрес группы, чтобы отметить и ленту по старому адресу."""
+    instance._saved_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def group_feeds_changed(sender, instance, **kwargs):
+    """Отмечает изменёнными ленты, где выводится название группы."""
+    slugs = {instance._saved_slug, instance.slug} - {None}
+    touch_group_feeds(instance, *slugs)
+    instance._saved_slug = instance.slug
+
+
+@receiver(pre_delete, sender=Group)
+def group_feeds_removed(sender, instance, **kwargs):
+    """Отмечает ленты удаляемой группы, пока её посты ещё в ней."""
+    touch_group_feeds(instance, instance.slug)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    """Убирает архив удалённой группы: её посты остаются без группы."""
+    PostMonth.objects.filter(scope=group_scope(instance.pk)).delete()
+
+
+@receiver(post_init, sender=User)
+def remember_author_names(sender, instance, **kwargs):
+    """Запоминает имя пользователя, чтобы заметить его смену."""
+    instance._saved_names = author_names(instance)
+
+
+@receiver(post_save, sender=User)
+def author_renamed(sender, instance, created, **kwargs):
+    """Сбрасывает ленты и фрагменты, где показано прежнее имя автора.
+
+    Сохранения без смены имени (например, last_login при входе)
+    кэш не трогают.
+    """
+    names = author_names(instance)
+    if not created and names != instance._saved_names:
+        touch_author_feeds(
+            instance, instance._saved_names[0], instance.username)
+        bump_feed_version()
+    instance._saved_names = names
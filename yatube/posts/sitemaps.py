@@ -0,0 +1,144 @@
+"""Файлы sitemap для постов, групп и профилей авторов.
+
+Карта разбита на файлы по SITEMAP_CHUNK_SIZE адресов: посты делятся на
+диапазоны pk, поэтому новый пост меняет только последний файл. Для
+каждого файла постов в manifest.json хранится подпись (число постов
+и дата последнего), и при повторной сборке переписываются только
+файлы с изменившейся подписью. Группы и профили пересобираются целиком.
+"""
+import json
+import os
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, Max
+from django.db.models.functions import Cast
+from django.urls import reverse
+
+from .models import Group, Post
+
+User = get_user_model()
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def write_file(name, lines):
+    """Атомарно записывает файл в SITEMAP_ROOT."""
+    path = os.path.join(settings.SITEMAP_ROOT, name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as sitemap_file:
+        sitemap_file.writelines(lines)
+    os.replace(path + '.tmp', path)
+
+
+def urlset(entries):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    for location, lastmod in entries:
+        yield f'<url><loc>{escape(settings.SITEMAP_BASE_URL + location)}</loc>'
+        if lastmod:
+            yield f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        yield '</url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(files):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    for name, lastmod in files:
+        location = settings.SITEMAP_BASE_URL + settings.SITEMAP_URL + name
+        yield f'<sitemap><loc>{escape(location)}</loc>'
+        if lastmod:
+            yield f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+        yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def chunk_of(queryset):
+    """Добавляет номер файла, в который попадает объект по его pk."""
+    return queryset.annotate(chunk=Cast(
+        (F('pk') - 1) / settings.SITEMAP_CHUNK_SIZE, IntegerField()))
+
+
+def post_entries(chunk):
+    posts = chunk_of(Post.objects.order_by('pk')).filter(
+        chunk=chunk).values_list('pk', 'pub_date')
+    for pk, pub_date in posts.iterator():
+        yield reverse('posts:post_detail', args=(pk,)), pub_date
+
+
+def build_posts(manifest):
+    """Переписывает изменившиеся файлы постов и возвращает список всех."""
+    signatures = chunk_of(Post.objects.order_by()).values('chunk').annotate(
+        count=Count('pk'), last=Max('pub_date')).order_by('chunk')
+    files, written = [], 0
+    for signature in signatures:
+        name = f'sitemap-posts-{signature["chunk"]}.xml'
+        stamp = f'{signature["count"]}:{signature["last"].isoformat()}'
+        path = os.path.join(settings.SITEMAP_ROOT, name)
+        if manifest.get(name) != stamp or not os.path.exists(path):
+            write_file(name, urlset(post_entries(signature['chunk'])))
+            manifest[name] = stamp
+            written += 1
+        files.append((name, signature['last']))
+    for name in set(manifest) - {name for name, _ in files}:
+        # Все посты диапазона удалены
+        del manifest[name]
+        path = os.path.join(settings.SITEMAP_ROOT, name)
+        if os.path.exists(path):
+            os.remove(path)
+    return files, written
+
+
+def build_section(section, entries):
+    """Пишет раздел целиком, разбивая его на файлы по размеру."""
+    files, chunk, last = [], [], None
+    for location, lastmod in entries:
+        chunk.append((location, lastmod))
+        if lastmod and (last is None or lastmod > last):
+            last = lastmod
+        if len(chunk) == settings.SITEMAP_CHUNK_SIZE:
+            files.append(write_chunk(section, len(files), chunk, last))
+            chunk, last = [], None
+    if chunk or not files:
+        files.append(write_chunk(section, len(files), chunk, last))
+    return files
+
+
+def write_chunk(section, number, entries, last):
+    name = f'sitemap-{section}-{number}.xml'
+    write_file(name, urlset(entries))
+    return name, last
+
+
+def group_entries():
+    groups = Group.objects.order_by('pk').values_list(
+        'slug', 'stats__last_post')
+    for slug, last_post in groups.iterator():
+        yield reverse('posts:group_posts', args=(slug,)), last_post
+
+
+def profile_entries():
+    authors = User.objects.filter(posts__isnull=False).annotate(
+        last_post=Max('posts__pub_date')
+    ).order_by('pk').values_list('username', 'last_post')
+    for username, last_post in authors.iterator():
+        yield reverse('posts:profile', args=(username,)), last_post
+
+
+def build_sitemaps():
+    """Собирает sitemap и возвращает (всего файлов, переписано постов)."""
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    manifest_path = os.path.join(settings.SITEMAP_ROOT, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    files, written = build_posts(manifest)
+    files += build_section('groups', group_entries())
+    files += build_section('profiles', profile_entries())
+    write_file(INDEX_NAME, sitemap_index(files))
+    write_file(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    return len(files), written
@@ -0,0 +1,67 @@
+from itertools import islice
+
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from .bulk import BULK_BATCH_SIZE, delete_batch, move_batch, run_in_batches
+from .models import Comment, Follow, Notification, Post
+
+FANOUT_BATCH_SIZE = 1000
+
+
+@task
+def generate_thumbnail(post_id):
+    """Заранее готовит миниатюру картинки поста для лент."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+
+@task
+def notify_followers(post_id):
+    """Записывает уведомления о новом посте всем подписчикам автора.
+
+    Письма отправляет команда send_digests одним дайджестом на человека.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True).iterator()
+    while True:
+        batch = list(islice(followers, FANOUT_BATCH_SIZE))
+        if not batch:
+            return
+        Notification.objects.bulk_create(
+            Notification(user_id=user_id, post=post) for user_id in batch)
+
+
+@task
+def move_posts(post_ids, group_id):
+    """Переносит посты в группу (group_id=None — убирает из групп)."""
+    run_in_batches(
+        post_ids,
+        lambda batch, affected: move_batch(batch, group_id, affected))
+
+
+@task
+def delete_posts(post_ids):
+    """Удаляет посты вместе с комментариями."""
+    run_in_batches(post_ids, delete_batch)
+
+
+@task
+def purge_user_content(user_id):
+    """Удаляет все посты пользователя и его комментарии к чужим постам."""
+    post_ids = list(
+        Post.objects.filter(author_id=user_id).values_list('pk', flat=True))
+    run_in_batches(post_ids, delete_batch)
+    comments = Comment.objects.filter(author_id=user_id)
+    while True:
+        batch = list(comments.values_list('pk', flat=True)[:BULK_BATCH_SIZE])
+        if not batch:
+            return
+        Comment.objects.filter(pk__in=batch).delete()
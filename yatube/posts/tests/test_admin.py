@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.admin import helpers
+from django.urls import reverse
+
+from core.models import Task
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, number):
+        start = Post.objects.count()
+        for index in range(start, start + number):
+            author = User.objects.create_user(username=f'author{index}')
+            group = Group.objects.create(
+                title=f'Группа {index}', slug=f'group{index}')
+            post = Post.objects.create(
+                text='Тестовый текст', author=author, group=group)
+            Comment.objects.create(post=post, author=author, text='Текст')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        for name in ('admin:posts_post_changelist',
+                     'admin:posts_comment_changelist'):
+            with self.subTest(name=name):
+                self.add_rows(2)
+                before = self.count_queries(reverse(name))
+                self.add_rows(5)
+                self.assertEqual(self.count_queries(reverse(name)), before)
+
+
+class AdminBulkActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Группа', slug='bulk')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.admin)
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_delete_is_queued(self):
+        """Удаление из админки ставит задачу, а не удаляет в запросе."""
+        self.client.post(self.url, {
+            'action': 'delete_in_background',
+            helpers.ACTION_CHECKBOX_NAME: [self.post.pk],
+        })
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(
+            Task.objects.filter(name='posts.tasks.delete_posts').exists())
+
+    def test_move_asks_for_group(self):
+        """Перенос сначала спрашивает группу, затем ставит задачу."""
+        data = {
+            'action': 'move_to_group',
+            helpers.ACTION_CHECKBOX_NAME: [self.post.pk],
+        }
+        response = self.client.post(self.url, data)
+        self.assertContains(response, 'Перенос постов в группу')
+        self.assertFalse(Task.objects.exists())
+        self.client.post(
+            self.url, {**data, 'apply': '1', 'group': self.group.pk})
+        self.assertTrue(
+            Task.objects.filter(name='posts.tasks.move_posts').exists())
@@ -4,8 +4,11 @@ from http import HTTPStatus
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Comment, Group, Post
@@ -168,3 +171,55 @@ class PostCreateFormTests(TestCase):
                              reverse('users:login') + '?next=' + reverse(
                                  'posts:add_comment',
                                  kwargs={'post_id': self.post.pk}))
+
+
+class GroupCatalogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_group_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse('posts:post_create'))
+        return response, [
+            query for query in queries
+            if 'FROM "posts_group"' in query['sql']
+        ]
+
+    def test_group_choices_cached(self):
+        """Форма поста берёт список групп из кэша."""
+        self.get_group_queries()
+        response, group_queries = self.get_group_queries()
+        self.assertEqual(group_queries, [])
+        self.assertContains(
+            response, f'<option value="{self.group.pk}">{self.group}')
+
+    def test_new_group_resets_cache(self):
+        """Новая группа сразу появляется в форме поста."""
+        self.get_group_queries()
+        group = Group.objects.create(
+            title='Новая группа',
+            slug='new_slug',
+            description='Тестовое описание'
+        )
+        response, group_queries = self.get_group_queries()
+        self.assertEqual(len(group_queries), 1)
+        self.assertContains(response, f'<option value="{group.pk}">')
+
+    def test_version_not_lost_with_process_cache(self):
+        """Версия списка групп хранится в общем кэше, а не в кэше процесса."""
+        self.get_group_queries()
+        cache.clear()
+        response, group_queries = self.get_group_queries()
+        self.assertEqual(group_queries, [])
@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+
+from ..archive import group_scope
+from ..models import (Comment, Follow, Group, GroupStats, Notification, Post,
+                      PostMonth)
+from ..sitemaps import build_sitemaps
+from ..tasks import delete_posts, move_posts, purge_user_content
+
+User = get_user_model()
+
+
+class NotificationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.follower = User.objects.create_user(
+            username='TestFollower', email='follower@yatube.ru')
+        cls.silent = User.objects.create_user(username='TestSilent')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Follow.objects.create(user=cls.silent, author=cls.author)
+
+    def setUp(self):
+        self.author_client = self.client_class()
+        self.author_client.force_login(self.author)
+
+    def test_new_posts_sent_in_one_digest(self):
+        """Подписчик получает один дайджест на несколько постов."""
+        for text in ('Первый пост', 'Второй пост'):
+            self.author_client.post(
+                reverse('posts:post_create'), {'text': text})
+        self.assertEqual(Notification.objects.count(), 0)
+        run_pending()
+        self.assertEqual(Notification.objects.count(), 4)
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.follower.email])
+        self.assertIn('Первый пост', mail.outbox[0].body)
+        self.assertIn('Второй пост', mail.outbox[0].body)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_edit_does_not_notify(self):
+        """Редактирование поста не создаёт уведомлений."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.author_client.post(
+            reverse('posts:post_edit', args=(post.pk,)), {'text': 'Правка'})
+        run_pending()
+        self.assertFalse(Notification.objects.exists())
+
+
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sitemap_root = tempfile.mkdtemp()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        for _ in range(3):
+            Post.objects.create(
+                text='Тестовый текст', author=cls.user, group=cls.group)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.sitemap_root, ignore_errors=True)
+
+    def test_only_changed_chunks_rewritten(self):
+        """Повторная сборка переписывает только изменившиеся файлы."""
+        with self.settings(SITEMAP_ROOT=self.sitemap_root,
+                           SITEMAP_CHUNK_SIZE=2):
+            total, written = build_sitemaps()
+            self.assertEqual((total, written), (4, 2))
+            self.assertEqual(build_sitemaps(), (4, 0))
+            Post.objects.create(text='Новый пост', author=self.user)
+            self.assertEqual(build_sitemaps()[1], 1)
+        with open(os.path.join(self.sitemap_root, 'sitemap.xml')) as index:
+            self.assertIn('sitemap-profiles-0.xml', index.read())
+        post_files = [
+            name for name in os.listdir(self.sitemap_root)
+            if name.startswith('sitemap-posts-')
+        ]
+        urls = ''.join(
+            open(os.path.join(self.sitemap_root, name)).read()
+            for name in post_files)
+        self.assertEqual(urls.count('<url>'), 4)
+
+
+class BulkTaskTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='TestOther')
+        cls.group = Group.objects.create(title='Группа', slug='first')
+        cls.group_2 = Group.objects.create(title='Группа 2', slug='second')
+
+    def setUp(self):
+        self.posts = [
+            Post.objects.create(
+                text='Тестовый текст', author=self.user, group=self.group)
+            for _ in range(3)
+        ]
+        self.ids = [post.pk for post in self.posts]
+        Comment.objects.create(
+            post=self.posts[0], author=self.other, text='Комментарий')
+
+    def run_task(self, task_obj):
+        run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.DONE)
+        return task_obj
+
+    def test_move_posts(self):
+        """Перенос обновляет посты, статистику групп и архив."""
+        task_obj = self.run_task(move_posts.delay(self.ids, self.group_2.pk))
+        self.assertEqual((task_obj.progress, task_obj.total), (3, 3))
+        self.assertEqual(
+            Post.objects.filter(group=self.group_2).count(), 3)
+        self.assertEqual(GroupStats.objects.get(group=self.group_2)
+                         .post_count, 3)
+        self.assertEqual(GroupStats.objects.get(group=self.group)
+                         .post_count, 0)
+        self.assertEqual(PostMonth.objects.get(
+            scope=group_scope(self.group_2.pk)).post_count, 3)
+        self.assertFalse(PostMonth.objects.filter(
+            scope=group_scope(self.group.pk)).exists())
+
+    def test_delete_posts(self):
+        """Удаление убирает посты с комментариями и обновляет статистику."""
+        self.run_task(delete_posts.delay(self.ids[:2]))
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)),
+                         self.ids[2:])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(GroupStats.objects.get(group=self.group)
+                         .post_count, 1)
+        self.assertEqual(PostMonth.objects.get(scope='site').post_count, 1)
+
+    def test_purge_user_content(self):
+        """Очистка удаляет посты пользователя и его чужие комментарии."""
+        other_post = Post.objects.create(text='Чужой пост', author=self.other)
+        Comment.objects.create(
+            post=other_post, author=self.user, text='Комментарий')
+        self.run_task(purge_user_content.delay(self.user.pk))
+        self.assertEqual(list(Post.objects.all()), [other_post])
+        self.assertFalse(Comment.objects.filter(author=self.user).exists())
@@ -1,13 +1,29 @@
+from collections import defaultdict
+from datetime import timedelta
 from http import HTTPStatus
+from unittest.mock import patch
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from ..models import Follow, Group, Post
+from core.cache import shared_cache
+
+from ..archive import (SITE_SCOPE, author_scope, group_scope, month_start,
+                       rebuild_archive)
+from ..counters import ViewCounter, view_counter
+from ..fragments import get_feed_version
+from .. import feeds
+from ..models import (Comment, Follow, Group, GroupStats, Post, PostMonth,
+                      TrendingPost)
+from ..recommendations import compute_recommendations, score_user
+from ..trending import recompute_trending
 
 User = get_user_model()
 
@@ -146,6 +162,29 @@ class PostPagesTests(TestCase):
         posts_object = response.context['posts']
         self.assertNotIn(self.post, posts_object)
 
+    def test_feed_queries_do_not_grow_with_posts(self):
+        """Число запросов ленты не зависит от количества постов."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                cache.clear()
+                with CaptureQueriesContext(connection) as before:
+                    self.guest_client.get(page)
+                extra = Post.objects.create(
+                    text='Ещё один пост',
+                    author=self.user,
+                    group=self.group
+                )
+                cache.clear()
+                with CaptureQueriesContext(connection) as after:
+                    self.guest_client.get(page)
+                extra.delete()
+                self.assertEqual(len(before), len(after))
+
     class PaginatorViewsTest(TestCase):
         @classmethod
         def setUpClass(cls):
@@ -288,3 +327,529 @@ class PostPagesTests(TestCase):
             response = authorized_user.get(reverse('posts:follow_index'))
             post = response.context['posts']
             self.assertNotIn(self.post, post)
+
+
+class TrendingViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.quiet_post = Post.objects.create(
+            text='Тихий пост', author=cls.user)
+        cls.hot_post = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.user)
+
+    def test_commented_post_ranks_first(self):
+        """Пост с комментариями поднимается в рейтинге."""
+        recompute_trending()
+        Comment.objects.create(
+            post=self.hot_post, author=self.user, text='Комментарий')
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.hot_post, self.quiet_post])
+        # Посты выводятся общими карточками, как в остальных лентах
+        self.assertTemplateUsed(response, 'includes/post_card.html')
+
+    def test_comment_never_lowers_rank(self):
+        """Очки после комментария сравнимы с очками пересчёта."""
+        Post.objects.filter(pk=self.hot_post.pk).update(
+            pub_date=timezone.now() - timedelta(hours=10))
+        recompute_trending()
+        before = TrendingPost.objects.get(post=self.hot_post).score
+        Comment.objects.create(
+            post=Post.objects.get(pk=self.hot_post.pk), author=self.user,
+            text='Комментарий')
+        after = TrendingPost.objects.get(post=self.hot_post).score
+        self.assertGreater(after, before)
+        recompute_trending()
+        self.assertAlmostEqual(
+            TrendingPost.objects.get(post=self.hot_post).score, after)
+
+    def test_old_posts_leave_ranking(self):
+        """Посты старше окна рейтинга убираются при пересчёте."""
+        recompute_trending()
+        Post.objects.filter(pk=self.quiet_post.pk).update(
+            pub_date=timezone.now() - timedelta(
+                days=settings.TRENDING_WINDOW_DAYS + 1))
+        recompute_trending()
+        self.assertFalse(
+            TrendingPost.objects.filter(post=self.quiet_post).exists())
+
+
+@override_settings(
+    VIEW_COUNTER_FLUSH_SECONDS=3600, VIEW_COUNTER_MAX_PENDING=3)
+class ViewCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Сбрасываю просмотры, оставшиеся от других тестов
+        view_counter.flush()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def test_views_written_in_batch(self):
+        """Просмотры попадают в базу пачкой, а не на каждый запрос."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for _ in range(2):
+            self.client.get(url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 0)
+        response = self.client.get(url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+        self.assertContains(response, 'Просмотров:')
+
+    def test_database_error_keeps_views(self):
+        """Ошибка базы при сбросе не ломает страницу и не теряет просмотры."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        error = OperationalError('database is locked')
+        with patch.object(view_counter, 'write', side_effect=error):
+            with self.assertLogs('posts.counters', level='ERROR'):
+                for _ in range(3):
+                    response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        view_counter.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+
+    def test_background_flush_restarted_after_fork(self):
+        """Фоновый сброс запускается и в процессе, порождённом fork."""
+        counter = ViewCounter()
+        with patch('posts.counters.threading.Thread') as thread, \
+                patch('posts.counters.atexit.register') as register:
+            counter.start()
+            counter.start()
+            self.assertEqual(thread.call_count, 1)
+            register.assert_called_once_with(counter.flush)
+            with patch('posts.counters.os.getpid', return_value=-1):
+                counter.hit(self.post.pk)
+            self.assertEqual(thread.call_count, 2)
+
+
+class FollowRecommendationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.friend = User.objects.create_user(username='TestFriend')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.neighbour = User.objects.create_user(username='TestNeighbour')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.friend)
+        Post.objects.create(
+            text='Пост автора', author=cls.author, group=cls.group)
+        Post.objects.create(
+            text='Пост соседа', author=cls.neighbour, group=cls.group)
+
+    def test_recommendations_shown_on_follow_index(self):
+        """Рекомендации считаются командой и видны в ленте подписок."""
+        compute_recommendations()
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        recommended = [
+            recommendation.author
+            for recommendation in response.context['recommendations']
+        ]
+        self.assertEqual(recommended, [self.friend, self.neighbour])
+
+    def test_co_follow_normalised_by_other_readers(self):
+        """Совместные подписки делятся на число прочих читателей автора."""
+        following = defaultdict(set, {1: {10}, 2: {10, 20}, 3: {10, 20, 30}})
+        followers = defaultdict(set, {10: {1, 2, 3}, 20: {2, 3}, 30: {3}})
+        co_follow = {}
+        scores = score_user(
+            1, following, followers, defaultdict(set), defaultdict(set),
+            co_follow)
+        self.assertEqual(scores, [(20, 0.5), (30, 0.25)])
+        self.assertEqual(list(co_follow), [10])
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.group_2 = Group.objects.create(
+            title='Тестовый заголовок_2',
+            slug='test_slug_2',
+            description='Тестовое описание_2'
+        )
+
+    def get_post_count(self, group):
+        return GroupStats.objects.get(group=group).post_count
+
+    def test_stats_follow_post_writes(self):
+        """Статистика групп обновляется при создании, переносе и удалении."""
+        post = Post.objects.create(
+            text='Тестовый текст', author=self.user, group=self.group)
+        Post.objects.create(
+            text='Тестовый текст', author=self.user, group=self.group)
+        self.assertEqual(self.get_post_count(self.group), 2)
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Новый текст', 'group': self.group_2.pk})
+        self.assertEqual(self.get_post_count(self.group), 1)
+        self.assertEqual(self.get_post_count(self.group_2), 1)
+        Post.objects.get(pk=post.pk).delete()
+        self.assertEqual(self.get_post_count(self.group_2), 0)
+
+    def test_group_index_has_no_aggregates(self):
+        """Каталог групп показывает статистику без агрегатов по постам."""
+        Post.objects.create(
+            text='Тестовый текст', author=self.user, group=self.group)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:group_index'))
+        self.assertContains(response, 'Всего постов: 1')
+        self.assertContains(response, 'Всего постов: 0')
+        self.assertFalse(any(
+            'posts_post' in query['sql'] for query in queries))
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_posts(self):
+        """RSS и Atom ленты отдают посты сайта, группы и автора."""
+        urls = (
+            reverse('posts:rss'),
+            reverse('posts:atom'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:group_atom', args=(self.group.slug,)),
+            reverse('posts:profile_rss', args=(self.user.username,)),
+            reverse('posts:profile_atom', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, self.post.text)
+
+    def test_unchanged_feed_answers_not_modified(self):
+        """Повторный опрос неизменной ленты — 304 без запросов к постам."""
+        url = reverse('posts:group_rss', args=(self.group.slug,))
+        response = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            repeated = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(
+            [query for query in queries if 'posts_' in query['sql']])
+        repeated = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(repeated.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_changes_feed(self):
+        """Правка поста меняет ETag ленты."""
+        url = reverse('posts:rss')
+        response = self.client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(repeated, 'Исправленный текст')
+
+    def test_group_rename_changes_feeds(self):
+        """Новое название группы сразу попадает в ленты с её постами."""
+        urls = (
+            reverse('posts:rss'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:profile_rss', args=(self.user.username,)),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Новое название')
+
+    def test_deleted_group_removed_from_feeds(self):
+        """После удаления группы общая лента не отвечает 304."""
+        url = reverse('posts:rss')
+        etag = self.client.get(url)['ETag']
+        Group.objects.get(pk=self.group.pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, self.group.title)
+
+    def test_author_rename_changes_feeds(self):
+        """Смена имени автора меняет ETag лент с его постами."""
+        urls = (
+            reverse('posts:rss'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        user = User.objects.get(pk=self.user.pk)
+        user.last_name = 'Петров'
+        user.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_stamp_shared_between_workers(self):
+        """Отметка ленты не теряется вместе с кэшем процесса."""
+        url = reverse('posts:rss')
+        response = self.client.get(url)
+        # Другой воркер: свой пустой кэш процесса
+        cache.clear()
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый пост', author=self.user)
+        cache.clear()
+        repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(repeated, 'Новый пост')
+
+    def test_unknown_feed_has_no_stamp(self):
+        """Лента несуществующей группы — 404 без отметки в кэше."""
+        responses = (
+            self.client.get(reverse('posts:group_rss', args=('missing',))),
+            self.client.get(reverse('posts:profile_atom', args=('ghost',))),
+        )
+        for response in responses:
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        scopes = (feeds.group_scope('missing'), feeds.author_scope('ghost'))
+        for scope in scopes:
+            self.assertIsNone(shared_cache.get(feeds.stamp_key(scope)))
+
+
+class IndexFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        for number in range(settings.NUM_POST + 1):
+            Post.objects.create(text=f'Пост номер {number}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_switcher_not_shared_between_users(self):
+        """Гость, открывший ленту первым, не прячет меню от пользователя."""
+        self.client.get(reverse('posts:index'))
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        response = authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Избранные авторы')
+
+    def test_pages_cached_separately(self):
+        """Каждая страница ленты кэшируется отдельно."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertContains(response, 'Пост номер 0')
+
+    def test_new_post_resets_cache(self):
+        """Новый пост сразу виден в закэшированной ленте."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(text='Свежий пост', author=self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_author_rename_resets_cache(self):
+        """Новое имя автора сразу видно в закэшированной ленте."""
+        self.client.get(reverse('posts:index'))
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Пётр'
+        user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пётр')
+
+    def test_login_keeps_cache(self):
+        """Вход пользователя (запись last_login) не сбрасывает ленту."""
+        version = get_feed_version()
+        self.client.force_login(self.user)
+        self.assertEqual(get_feed_version(), version)
+
+    def test_version_not_lost_with_process_cache(self):
+        """Версия фрагментов хранится в общем кэше, а не в кэше процесса."""
+        version = get_feed_version()
+        cache.clear()
+        self.assertEqual(get_feed_version(), version)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='TestUser', first_name='Иван')
+        cls.group = Group.objects.create(title='Группа', slug='cards')
+        cls.post = Post.objects.create(
+            text='Пост с карточкой', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_card_shared_between_feeds(self):
+        """Карточка, отрисованная в ленте, берётся из кэша в профиле."""
+        self.client.get(reverse('posts:index'))
+        with patch('posts.cards.render_to_string') as mock:
+            response = self.client.get(
+                reverse('posts:profile', args=[self.user.username]))
+        mock.assert_not_called()
+        self.assertContains(response, 'Пост с карточкой')
+
+    def test_edit_renders_new_card(self):
+        """После правки поста карточка рисуется заново."""
+        url = reverse('posts:group_posts', args=[self.group.slug])
+        self.client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.client.get(url), 'Исправленный пост')
+
+    def test_author_rename_renders_new_card(self):
+        """Новое имя автора попадает в карточку без очистки кэша."""
+        url = reverse('posts:group_posts', args=[self.group.slug])
+        self.client.get(url)
+        User.objects.filter(pk=self.user.pk).update(first_name='Пётр')
+        self.assertContains(self.client.get(url), 'Пётр')
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamingViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        for number in range(5):
+            Post.objects.create(text=f'Пост номер {number}', author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_archive_streams_all_posts(self):
+        """Архив автора отдаётся потоком и содержит все посты."""
+        response = self.client.get(
+            reverse('posts:profile_archive', args=[self.user.username]))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for number in range(5):
+            self.assertIn(f'Пост номер {number}', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+    def test_export_csv(self):
+        """Выгрузка содержит заголовок и строку на каждый пост."""
+        response = self.authorized_client.get(reverse('posts:export_posts'))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,pub_date,group,image,text')
+        self.assertEqual(len(lines), 6)
+
+    def test_export_requires_login(self):
+        response = self.client.get(reverse('posts:export_posts'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='archive')
+        cls.group_2 = Group.objects.create(title='Группа 2', slug='other')
+        cls.old = Post.objects.create(
+            text='Старый пост', author=cls.user, group=cls.group)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        cls.new = Post.objects.create(
+            text='Новый пост', author=cls.user, group=cls.group)
+        rebuild_archive()
+
+    def get_count(self, scope, post):
+        post = Post.objects.get(pk=post.pk)
+        return PostMonth.objects.get(
+            scope=scope, month=month_start(post.pub_date)).post_count
+
+    def test_buckets_follow_post_writes(self):
+        """Счётчики месяцев обновляются при создании, переносе и удалении."""
+        post = Post.objects.create(
+            text='Ещё пост', author=self.user, group=self.group)
+        self.assertEqual(self.get_count(SITE_SCOPE, post), 2)
+        self.assertEqual(self.get_count(author_scope(self.user.pk), post), 2)
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(self.get_count(group_scope(self.group.pk), post), 1)
+        self.assertEqual(
+            self.get_count(group_scope(self.group_2.pk), post), 1)
+        post.delete()
+        self.assertEqual(self.get_count(SITE_SCOPE, self.new), 1)
+        self.assertFalse(PostMonth.objects.filter(
+            scope=group_scope(self.group_2.pk)).exists())
+
+    def test_month_page_shows_only_its_posts(self):
+        """Страница месяца показывает только посты этого месяца."""
+        old = Post.objects.get(pk=self.old.pk).pub_date
+        for url in (
+            reverse('posts:archive_month', args=[old.year, old.month]),
+            reverse('posts:author_archive_month',
+                    args=[self.user.username, old.year, old.month]),
+            reverse('posts:group_archive_month',
+                    args=[self.group.slug, old.year, old.month]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Старый пост')
+                self.assertNotContains(response, 'Новый пост')
+
+    def test_archive_lists_months(self):
+        """Архив без месяца показывает все месяцы со ссылками."""
+        old = Post.objects.get(pk=self.old.pk).pub_date
+        response = self.client.get(
+            reverse('posts:author_archive', args=[self.user.username]))
+        self.assertContains(response, reverse(
+            'posts:author_archive_month',
+            args=[self.user.username, old.year, old.month]))
+        self.assertEqual(len(response.context['months']), 2)
+
+    def test_unknown_month_not_found(self):
+        response = self.client.get(
+            reverse('posts:archive_month', args=[2020, 13]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_edge_months_do_not_fail(self):
+        """Первый и последний представимые месяцы открываются без ошибки."""
+        for year, month in ((9999, 12), (1, 1)):
+            for url in (
+                reverse('posts:archive_month', args=[year, month]),
+                reverse('posts:author_archive_month',
+                        args=[self.user.username, year, month]),
+                reverse('posts:group_archive_month',
+                        args=[self.group.slug, year, month]),
+            ):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertNotContains(response, 'Новый пост')
+
+    def test_out_of_range_year_not_found(self):
+        response = self.client.get(
+            reverse('posts:archive_month', args=[10000, 1]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
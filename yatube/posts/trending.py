@@ -0,0 +1,65 @@
+"""Рейтинг популярных постов с затуханием по времени.
+
+Активность поста — взвешенная сумма комментариев и просмотров; её вес
+падает вдвое каждые TRENDING_HALF_LIFE_HOURS с публикации. Хранится
+не сам затухший вес, а log2(активности) плюс время публикации
+в периодах полураспада: такие очки не зависят от момента подсчёта,
+а порядок по ним совпадает с порядком по затухшей активности.
+Поэтому строку поста можно пересчитать при новом комментарии,
+не трогая остальные, а команда recompute_trending лишь добавляет
+накопленные просмотры и убирает вышедшие из окна посты.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Post, TrendingPost
+
+
+def trending_score(pub_date, comments, views):
+    activity = (comments * settings.TRENDING_COMMENT_WEIGHT
+                + views * settings.TRENDING_VIEW_WEIGHT + 1)
+    half_lives = pub_date.timestamp() / (
+        settings.TRENDING_HALF_LIFE_HOURS * 3600)
+    return math.log2(activity) + half_lives
+
+
+def window_start(now=None):
+    now = now or timezone.now()
+    return now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+
+
+def update_post_score(post):
+    """Пересчитывает очки одного поста, например после комментария."""
+    if post.pub_date < window_start():
+        return
+    TrendingPost.objects.update_or_create(
+        post=post,
+        defaults={'score': trending_score(
+            post.pub_date, post.comments.count(), post.view_count)},
+    )
+
+
+def recompute_trending():
+    """Пересчитывает весь рейтинг и убирает вышедшие из окна посты."""
+    now = timezone.now()
+    start = window_start(now)
+    TrendingPost.objects.filter(post__pub_date__lt=start).delete()
+    posts = Post.objects.filter(pub_date__gte=start).annotate(
+        comment_count=Count('comments')
+    ).values_list('pk', 'pub_date', 'comment_count', 'view_count')
+    ranking = [
+        TrendingPost(
+            post_id=pk,
+            score=trending_score(pub_date, comments, views))
+        for pk, pub_date, comments, views in posts
+    ]
+    existing = set(TrendingPost.objects.values_list('post_id', flat=True))
+    TrendingPost.objects.bulk_update(
+        [row for row in ranking if row.post_id in existing], ['score'])
+    TrendingPost.objects.bulk_create(
+        [row for row in ranking if row.post_id not in existing])
+    return len(ranking)
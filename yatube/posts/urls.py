@@ -1,14 +1,74 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'  # это namespace приложения posts
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.cached_feed(feeds.LatestPostsFeed), name='rss'),
+    path(
+        'atom/',
+        feeds.cached_feed(feeds.atom(feeds.LatestPostsFeed)),
+        name='atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.cached_feed(feeds.GroupPostsFeed),
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.cached_feed(feeds.atom(feeds.GroupPostsFeed)),
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.cached_feed(feeds.AuthorPostsFeed),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.cached_feed(feeds.atom(feeds.AuthorPostsFeed)),
+        name='profile_atom'
+    ),
+    path('trending/', views.trending, name='trending'),
+    path('archive/', views.archive, name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive,
+        name='archive_month'
+    ),
+    path(
+        'group/<slug:slug>/archive/',
+        views.group_archive,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive_month'
+    ),
+    path(
+        'profile/<str:username>/archive/',
+        views.author_archive,
+        name='author_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.author_archive,
+        name='author_archive_month'
+    ),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/all/',
+        views.profile_archive,
+        name='profile_archive'
+    ),
+    path('export/', views.export_posts, name='export_posts'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -1,17 +1,32 @@
+import datetime
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from core.idempotency import idempotent
+from core.paginator import CachedCountPaginator
+from core.ratelimit import ratelimit
+from core.routers import use_replica
+from core.streaming import chunked, stream_csv, stream_template
 
+from .archive import SITE_SCOPE, author_scope, group_scope, month_posts
+from .cards import render_cards
+from .counters import view_counter
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .fragments import get_feed_version
+from .models import Follow, FollowRecommendation, Group, Post, PostMonth
+from .tasks import generate_thumbnail, notify_followers
 
 User = get_user_model()
 
 
 def get_page_context(queryset, request):
-    paginator = Paginator(queryset, settings.NUM_POST)
+    paginator = CachedCountPaginator(queryset, settings.NUM_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
@@ -21,24 +36,56 @@ def get_page_context(queryset, request):
     }
 
 
+def schedule_post_side_effects(post):
+    """Откладывает тяжёлую работу после сохранения поста в фон."""
+    if post.image:
+        generate_thumbnail.delay(
+            post.pk, key=f'thumbnail:{post.pk}:{post.image.name}')
+
+
+@use_replica
 def index(request):
     """Выводит шаблон главной страницы"""
-    context = get_page_context(Post.objects.all(), request)
+    posts = Post.objects.select_related('author', 'group')
+    context = get_page_context(posts, request)
+    context['index'] = True
+    context['feed_version'] = get_feed_version()
     return render(request, 'posts/index.html', context)
 
 
+@use_replica
+def trending(request):
+    """Выводит шаблон с популярными постами"""
+    posts = Post.objects.filter(
+        trending__isnull=False
+    ).select_related('author', 'group').order_by('-trending__score')
+    context = get_page_context(posts, request)
+    return render(request, 'posts/trending.html', context)
+
+
+@use_replica
+def group_index(request):
+    """Выводит каталог групп со статистикой"""
+    groups = Group.objects.select_related('stats').order_by('title')
+    paginator = Paginator(groups, settings.NUM_POST)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
+
+
+@use_replica
 def group_posts(request, slug):
     """Выводит шаблон с группами постов"""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:10]
+    posts = group.posts.select_related('author', 'group')
     context = {
         'group': group,
-        'posts': posts,
+        'posts': posts[:10],
     }
-    context.update(get_page_context(group.posts.all(), request))
+    context.update(get_page_context(posts, request))
     return render(request, 'posts/group_list.html', context)
 
 
+@use_replica
 def profile(request, username):
     """Выводит шаблон профайла пользователя"""
     author = get_object_or_404(User, username=username)
@@ -48,39 +95,137 @@ def profile(request, username):
         'author': author,
         'following': following
     }
-    context.update(get_page_context(author.posts.all(), request))
+    context.update(
+        get_page_context(
+            author.posts.select_related('author', 'group'), request))
     return render(request, 'posts/profile.html', context)
 
 
+@use_replica
+def profile_archive(request, username):
+    """Все посты автора одной страницей, отдаваемой потоком."""
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related('author', 'group')
+    # Поток читается уже после выхода из view, когда use_replica снят,
+    # поэтому база выбирается сразу
+    posts = posts.using(posts.db)
+    rows = (
+        '\n<hr>\n'.join(render_cards(chunk)) + '\n<hr>\n'
+        for chunk in chunked(posts, settings.STREAM_CHUNK_SIZE)
+    )
+    return StreamingHttpResponse(stream_template(
+        'posts/profile_archive.html', {'author': author}, rows, request))
+
+
+@login_required
+def export_posts(request):
+    """Выгрузка всех постов пользователя в CSV потоком."""
+    posts = request.user.posts.select_related('group').order_by('pk')
+    rows = (
+        (post.pk, post.pub_date.isoformat(),
+         post.group.slug if post.group else '', post.image.name, post.text)
+        for chunk in chunked(posts, settings.STREAM_CHUNK_SIZE)
+        for post in chunk
+    )
+    response = StreamingHttpResponse(
+        stream_csv(('id', 'pub_date', 'group', 'image', 'text'), rows),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'attachment; filename="posts.csv"'
+    return response
+
+
+def render_archive(request, title, scope, url_name, url_args, year, month):
+    """Страница архива: месяцы с числом постов и посты выбранного месяца.
+
+    Список месяцев читается из PostMonth, а посты месяца выбираются
+    запросом по диапазону pub_date, без глубоких OFFSET.
+    """
+    months = [
+        {
+            'month': bucket.month,
+            'count': bucket.post_count,
+            'url': reverse(url_name + '_month', args=(
+                *url_args, bucket.month.year, bucket.month.month)),
+        }
+        for bucket in PostMonth.objects.filter(scope=scope)
+    ]
+    context = {'title': title, 'months': months}
+    if year is not None:
+        try:
+            selected = datetime.date(year, month, 1)
+            posts = month_posts(scope, selected)
+        except (ValueError, OverflowError):
+            raise Http404('Нет такого месяца')
+        posts = posts.select_related('author', 'group')
+        context['selected'] = selected
+        context.update(get_page_context(posts, request))
+    return render(request, 'posts/archive.html', context)
+
+
+@use_replica
+def archive(request, year=None, month=None):
+    """Архив всех постов сайта по месяцам"""
+    return render_archive(
+        request, 'Архив', SITE_SCOPE, 'posts:archive', (), year, month)
+
+
+@use_replica
+def author_archive(request, username, year=None, month=None):
+    """Архив постов автора по месяцам"""
+    author = get_object_or_404(User, username=username)
+    return render_archive(
+        request, f'Архив пользователя {author.username}',
+        author_scope(author.pk), 'posts:author_archive', (username,),
+        year, month)
+
+
+@use_replica
+def group_archive(request, slug, year=None, month=None):
+    """Архив постов группы по месяцам"""
+    group = get_object_or_404(Group, slug=slug)
+    return render_archive(
+        request, f'Архив группы {group.title}', group_scope(group.pk),
+        'posts:group_archive', (slug,), year, month)
+
+
+@use_replica
 def post_detail(request, post_id):
     """Выводит шаблон для просмотра отдельного поста"""
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id)
+    view_counter.hit(post.pk)
     form = CommentForm()
     author = post.author
     # Получаю количество постов определенного автора
-    counter = author.posts.all().count()
+    counter = author.posts.count()
+    # Комментарии сразу вместе с авторами, без запроса на каждый комментарий
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'counter': counter,
         'form': form,
+        'comments': comments,
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('post_create')
+@idempotent
 def post_create(request):
     """Выводит форму для создания нового поста"""
-    groups = Group.objects.all()
     form = PostForm(request.POST or None, files=request.FILES or None)
     context = {
-        'groups': groups,
         'form': form,
     }
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        schedule_post_side_effects(post)
+        notify_followers.delay(post.pk, key=f'notify:{post.pk}')
         return redirect('posts:profile', request.user.username)
     return render(request, 'posts/create_post.html', context)
 
@@ -89,7 +234,6 @@ def post_create(request):
 def post_edit(request, post_id):
     """Выводит форму редактирования поста"""
     template = 'posts/create_post.html'
-    groups = Group.objects.all()
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
@@ -98,16 +242,18 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save()
+        schedule_post_side_effects(post)
         return redirect('posts:post_detail', post_id=post.id)
     context = {
         'post': post,
-        'form': form,
-        'groups': groups}
+        'form': form}
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('add_comment')
+@idempotent
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -120,14 +266,22 @@ def add_comment(request, post_id):
 
 
 @login_required
+@use_replica
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.filter(
+        author__following__user=request.user
+    ).select_related('author', 'group')
     context = get_page_context(posts, request)
+    context['follow'] = True
+    context['recommendations'] = FollowRecommendation.objects.filter(
+        user=request.user
+    ).select_related('author')[:settings.FOLLOW_RECOMMENDATIONS_LIMIT]
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -136,6 +290,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
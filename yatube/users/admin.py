@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import message_task_queued
+from posts.tasks import purge_user_content
+
+User = get_user_model()
+
+
+class YatubeUserAdmin(UserAdmin):
+    actions = ['purge_content']
+
+    def purge_content(self, request, queryset):
+        for user_id in queryset.values_list('pk', flat=True):
+            task_obj = purge_user_content.delay(user_id)
+            message_task_queued(self, request, task_obj)
+    purge_content.short_description = (
+        'Удалить все посты и комментарии (в фоне)')
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
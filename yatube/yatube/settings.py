@@ -60,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -70,8 +71,9 @@ TEMPLATES = [
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
+            # debug не подключён: шаблоны не выводят debug и sql_queries,
+            # а при DEBUG он стоит ~20 мкс на каждый рендер
             'context_processors': [
-                'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
@@ -91,7 +93,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Сколько секунд держать соединение открытым между запросами;
+        # 0 — закрывать после каждого запроса, как раньше
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            # Сколько секунд ждать снятия блокировки до "database is locked"
+            'timeout': 20,
+        },
+    }
+}
+
+# Реплики для чтения ленты: пути к файлам SQLite через запятую.
+# Локально их наполняет команда sync_replicas.
+DATABASE_REPLICAS = []
+for number, replica_name in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICA_DBS', '').split(',')),
+    start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': replica_name,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Приложения, чьи модели можно читать с реплик
+REPLICA_APPS = ['posts']
+# Сколько секунд после записи пользователь читает из основной базы
+READ_YOUR_WRITES_SECONDS = 10
+
+# Проверять долгоживущие соединения перед каждым запросом
+# и переоткрывать неработоспособные (см. core/signals.py)
+DB_CONN_HEALTH_CHECKS = True
+
+# Выполняются для каждого нового соединения SQLite (см. core/signals.py).
+# WAL позволяет читателям работать параллельно с единственным писателем.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 20000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
 }
 
 
@@ -113,6 +157,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хеширование паролей: pbkdf2, argon2 или bcrypt (для двух последних
+# нужны пакеты argon2-cffi или bcrypt). Первым в PASSWORD_HASHERS стоит
+# выбранный хешер, остальные нужны для проверки старых хешей: при входе
+# пароль перехешируется под текущий хешер и число итераций PBKDF2
+PASSWORD_HASHER = os.environ.get('YATUBE_PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_ITERATIONS = int(
+    os.environ.get('YATUBE_PASSWORD_ITERATIONS', 150000))
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS.pop(PASSWORD_HASHER)] + [
+    *_PASSWORD_HASHERS.values(),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Тесты запускаются с дешёвым хешированием паролей (core/test_runner.py)
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -144,18 +208,108 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUM_POST = 10
 NUM_POST_IN_LAST_PAGE = 3
+# Сколько постов читать из базы за раз в потоковых ответах
+STREAM_CHUNK_SIZE = 500
+
+# Сколько секунд хранить в кэше готовую карточку поста
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Сколько секунд кэшировать число постов в лентах вместо COUNT(*)
+# на каждый запрос; 0 — считать точно каждый раз
+PAGINATOR_COUNT_TIMEOUT = 0
+
+# Сколько секунд админка кэширует число строк отфильтрованного списка
+ADMIN_COUNT_TIMEOUT = 60
+
+# RSS и Atom ленты (posts/feeds.py): число записей и время жизни
+# готового XML в кэше, сек.
+FEED_SIZE = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Sitemap (posts/sitemaps.py) собирается командой build_sitemaps
+# в SITEMAP_ROOT и раздаётся веб-сервером по адресу SITEMAP_URL
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_BASE_URL = 'https://alinavsk.pythonanywhere.com'
+SITEMAP_CHUNK_SIZE = 50000
+
+# Рейтинг популярных постов (posts/trending.py)
+TRENDING_WINDOW_DAYS = 7
+# Через сколько часов вес активности поста падает вдвое
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_COMMENT_WEIGHT = 3
+TRENDING_VIEW_WEIGHT = 0.1
+
+# Сколько авторов рекомендовать на странице подписок
+FOLLOW_RECOMMENDATIONS_LIMIT = 5
+
+# Просмотры постов копятся в памяти процесса и пишутся в базу пачкой
+# не реже, чем раз в VIEW_COUNTER_FLUSH_SECONDS, или при накоплении
+# VIEW_COUNTER_MAX_PENDING просмотров. Больше этого при падении не теряется.
+VIEW_COUNTER_FLUSH_SECONDS = 10
+VIEW_COUNTER_MAX_PENDING = 1000
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# default — кэш в памяти процесса для того, что можно пересчитать
+# (карточки постов, фрагменты, готовый XML лент). shared — общий для всех
+# воркеров кэш (core/cache.py): токены повторной отправки, версии
+# и отметки изменений. По умолчанию это таблица в базе,
+# её создаёт миграция core; в бою укажите Redis или memcached через
+# YATUBE_SHARED_CACHE_BACKEND и YATUBE_SHARED_CACHE_LOCATION
+SHARED_CACHE_ALIAS = 'shared'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    SHARED_CACHE_ALIAS: {
+        'BACKEND': os.environ.get(
+            'YATUBE_SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get(
+            'YATUBE_SHARED_CACHE_LOCATION', 'yatube_shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
 
+# Хранилище сессий: db — таблица django_session, signed_cookies —
+# подписанная cookie без обращений к базе и кэшу, cached_db и cache —
+# через общий кэш. Кэш процесса для сессий не годится: выход очистил бы
+# сессию только в одном воркере. cached_db и cache выигрывают только
+# с Redis или memcached: поверх DatabaseCache они всё равно читают базу
+# на каждый запрос, поэтому такое сочетание отклоняет проверка core.E001
+SESSION_BACKEND = os.environ.get('YATUBE_SESSION_BACKEND', 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_CACHE_ALIAS = SHARED_CACHE_ALIAS
+# Сколько просроченных сессий удалять одним DELETE (clear_sessions)
+SESSION_CLEANUP_BATCH_SIZE = 1000
+
+# Фоновые задачи (core.tasks): True — выполнять сразу, без воркера
+TASKS_EAGER = False
+# Базовая пауза перед повтором упавшей задачи, сек.
+TASKS_RETRY_DELAY = 5
+# Сколько секунд задача может выполняться без отметки о прогрессе, после
+# чего считается брошенной упавшим воркером и возвращается в очередь
+TASKS_LEASE_SECONDS = 600
+
+# Ограничение частоты запросов (core/ratelimit.py): для каждого
+# правила — лимит и период в секундах на пользователя и на IP
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    'post_create': {'user': (10, 60), 'ip': (30, 60)},
+    'add_comment': {'user': (20, 60), 'ip': (60, 60)},
+    'follow': {'user': (30, 60), 'ip': (100, 60)},
+    'signup': {'ip': (5, 60 * 60)},
+}
+
+# Повторная отправка формы с тем же токеном (core/idempotency.py):
+# сколько секунд помнить результат и сколько ждать первый запрос
+IDEMPOTENCY_TIMEOUT = 60 * 10
+IDEMPOTENCY_WAIT = 5
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -34,6 +34,9 @@ if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )
+    urlpatterns += static(
+        settings.SITEMAP_URL, document_root=settings.SITEMAP_ROOT
+    )
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
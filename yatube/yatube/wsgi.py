@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Импорт после get_wsgi_application: приложения уже загружены
+from posts.counters import view_counter  # noqa: E402
+
+view_counter.start()